@@ -0,0 +1,517 @@
+#------------------------------------------#
+# Title: Benchmark
+# Desc: A Module to time the hot paths of the CD Inventory
+#------------------------------------------#
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import DataClasses as DC
+import IOClasses as IO
+import InventoryServer as IS
+import ProcessingClasses as PC
+
+
+def generate_rows(n_albums: int, tracks_per_album: int, seed: int = 42, sparsity: float = 0.0, max_tracks: int = None):
+    """Generates the rows of a synthetic inventory, the same ones for the same arguments
+    Args:
+        n_albums (int): number of CD / Albums.
+        tracks_per_album (int): number of tracks on every CD / Album, the least number if max_tracks is given.
+        seed (int): seed for the random titles, lengths, ID gaps and track counts.
+        sparsity (float): chance that an ID is left out, 0 gives the IDs 1 to n_albums.
+        max_tracks (int, optional): the most tracks on a CD / Album, each one gets a random count in between.
+    Returns:
+        (cd_info, track_infos) (generator of tuples): (ID, CD Title, CD Artist) and a list of
+        (position, title, length) for every CD / Album.
+    """
+
+    rnd = random.Random(seed)
+    cd_id = 0
+    for _ in range(n_albums):
+        cd_id += 1
+        while sparsity and rnd.random() < sparsity:
+            cd_id += 1
+        n_tracks = tracks_per_album if max_tracks is None else rnd.randint(tracks_per_album, max_tracks)
+        cd_info = (cd_id, 'Album {}'.format(rnd.randrange(10 ** 6)), 'Artist {}'.format(rnd.randrange(1000)))
+        yield cd_info, [(pos, 'Track {}'.format(rnd.randrange(10 ** 4)),
+                         '{:02d}:{:02d}'.format(rnd.randrange(10), rnd.randrange(60)))
+                        for pos in range(1, n_tracks + 1)]
+
+
+def generate_inventory(n_albums: int, tracks_per_album: int, seed: int = 42, sparsity: float = 0.0,
+                       max_tracks: int = None) -> DC.Inventory:
+    """Builds a synthetic inventory out of generate_rows
+    Args:
+        n_albums (int): number of CD / Albums.
+        tracks_per_album (int): number of tracks on every CD / Album, the least number if max_tracks is given.
+        seed (int): seed for the random titles and lengths.
+        sparsity (float): chance that an ID is left out.
+        max_tracks (int, optional): the most tracks on a CD / Album.
+    Returns:
+        table (DC.Inventory): Inventory of CD objects.
+    """
+
+    table = DC.Inventory()
+    for cd_info, track_infos in generate_rows(n_albums, tracks_per_album, seed, sparsity, max_tracks):
+        cd = DC.CD(*cd_info)
+        cd.add_tracks(DC.Track(*track_info) for track_info in track_infos)
+        table.append(cd)
+    table.mark_clean()
+    return table
+
+
+def save_unbuffered(file_name: list, table) -> None:
+    """The previous FileIO.save_inventory: one write per record, files one after the other, in place"""
+    with open(file_name[0], 'w') as file:
+        for disc in table:
+            file.write(disc.get_record())
+    with open(file_name[1], 'w') as file:
+        for disc in table:
+            for track in disc.cd_tracks:
+                file.write('{},{}'.format(disc.cd_id, track.get_record()))
+
+
+def best_of(repeat: int, func, *args) -> float:
+    """Returns: (float) the shortest run time of func(*args) in seconds out of repeat runs"""
+    return best_of_setup(repeat, lambda: args, func)
+
+
+def best_of_setup(repeat: int, setup, func) -> float:
+    """Returns: (float) the shortest run time of func(*setup()) in seconds out of repeat runs,
+    without the time setup takes"""
+    best = None
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_save(n_albums: int, tracks_per_album: int, repeat: int = 3) -> dict:
+    """Times save_unbuffered against FileIO.save_inventory
+    Returns:
+        results (dict): seconds and MB/s of both implementations.
+    """
+
+    table = generate_inventory(n_albums, tracks_per_album)
+    with tempfile.TemporaryDirectory() as folder:
+        file_name = [os.path.join(folder, 'AlbumInventory.txt'), os.path.join(folder, 'TrackInventory.txt')]
+        results = {}
+        for label, func in (('unbuffered', save_unbuffered), ('buffered', IO.FileIO.save_inventory)):
+            seconds = best_of(repeat, func, file_name, table)
+            size = sum(os.path.getsize(name) for name in file_name) / 10 ** 6
+            results[label] = {'seconds': seconds, 'MB/s': size / seconds}
+    return results
+
+
+def bench_parallel_load(n_albums: int, tracks_per_album: int, worker_counts=(1, 2, 4), repeat: int = 3) -> dict:
+    """Times FileIO.load_inventory with different numbers of track parsing processes
+    Returns:
+        results (dict): seconds and speedup against one worker, keyed by number of workers.
+    Raises:
+        Exception: If a parallel load differs from the serial one.
+    """
+
+    table = generate_inventory(n_albums, tracks_per_album)
+    expected = [(disc.get_record(), [track.get_record() for track in disc.cd_tracks]) for disc in table]
+    with tempfile.TemporaryDirectory() as folder:
+        file_name = [os.path.join(folder, 'AlbumInventory.txt'), os.path.join(folder, 'TrackInventory.txt')]
+        IO.FileIO.save_inventory(file_name, table)
+        results = {}
+        for workers in worker_counts:
+            loaded = IO.FileIO.load_inventory(file_name, workers=workers)
+            if [(disc.get_record(), [track.get_record() for track in disc.cd_tracks]) for disc in loaded] != expected:
+                raise Exception('Parallel load with {} workers differs from the serial load'.format(workers))
+            results[workers] = {'seconds': best_of(repeat, IO.FileIO.load_inventory, file_name, None, workers)}
+        for result in results.values():
+            result['speedup'] = results[worker_counts[0]]['seconds'] / result['seconds']
+    return results
+
+
+def bench_reload(n_albums: int, tracks_per_album: int, repeat: int = 3) -> dict:
+    """Times TextFileStorage.reload, which merges what changed in the files, against a full load after
+    another process appended to the journal, edited a track title in place and appended an album
+    Returns:
+        results (dict): seconds of every kind of change, keyed by name.
+    Raises:
+        Exception: If the merged inventory differs from a full load of the changed files.
+    """
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_name = [os.path.join(folder, name)
+                     for name in ('AlbumInventory.txt', 'TrackInventory.txt', 'InventoryJournal.txt')]
+        IO.FileIO.save_inventory(file_name, generate_inventory(n_albums, tracks_per_album))
+        storage = IO.TextFileStorage(file_name)
+        results = {'full_load': best_of(repeat, storage.load)}
+        table = storage.load()
+        cd_ids = [disc.cd_id for disc in table.ordered()]
+        middle = cd_ids[len(cd_ids) // 2]
+
+        def journal_append():
+            other = IO.TextFileStorage(file_name)
+            other_table = other.load(lazy=True)
+            other_table.get_cd(middle).cd_title = 'Renamed'
+            other.save(other_table)
+
+        def track_edit():
+            with open(file_name[1], 'r+b') as file:
+                data = file.read()
+                offset = data.index('\n{},1,'.format(middle).encode()) + len(str(middle)) + 4
+                file.seek(offset)
+                file.write(b'X' if data[offset:offset + 1] != b'X' else b'Y')
+
+        def album_append():
+            with open(file_name[0], 'a') as file:
+                file.write('{},Appended,Someone\n'.format(cd_ids[-1] + 1))
+            with open(file_name[1], 'a') as file:
+                file.write('{},1,Only track,3:00\n'.format(cd_ids[-1] + 1))
+
+        for name, change in (('journal_append', journal_append), ('track_edit', track_edit),
+                             ('album_append', album_append)):
+            time.sleep(0.01)  # a new modification time
+            change()
+            start = time.perf_counter()
+            if not storage.reload(table):
+                raise Exception('{} needed a full load'.format(name))
+            results[name] = time.perf_counter() - start
+        full = IO.FileIO.load_inventory(file_name)
+        if sorted((disc.get_record(), disc.get_track_records()) for disc in table) != sorted(
+                (disc.get_record(), disc.get_track_records()) for disc in full):
+            raise Exception('The merged inventory differs from a full load')
+    return results
+
+
+def bench_suite(n_albums: int, tracks_per_album: int, seed: int = 42, sparsity: float = 0.0,
+                max_tracks: int = None, repeat: int = 3, lookups: int = 10000, pages: int = 100) -> dict:
+    """Times the hot paths of the CD Inventory on one synthetic inventory
+    Args:
+        n_albums, tracks_per_album, seed, sparsity, max_tracks: passed on to generate_rows.
+        repeat (int): runs of every operation, the fastest one counts.
+        lookups (int): number of random select_cd calls.
+        pages (int): number of show_inventory pages rendered, spread over the inventory.
+    Returns:
+        results (dict): seconds, ops and ops/s, keyed by operation.
+    """
+
+    rows = list(generate_rows(n_albums, tracks_per_album, seed, sparsity, max_tracks))
+    n_tracks = sum(len(track_infos) for _, track_infos in rows)
+    rnd = random.Random(seed)
+
+    def add_cds():
+        table = DC.Inventory()
+        for cd_info, _ in rows:
+            PC.DataProcessor.add_CD(cd_info, table)
+        return table
+
+    def add_tracks(table):
+        for cd, (_, track_infos) in zip(table, rows):
+            for track_info in track_infos:
+                PC.DataProcessor.add_track(track_info, cd)
+
+    def add_cds_batch():
+        table = DC.Inventory()
+        PC.DataProcessor.add_CDs((cd_info for cd_info, _ in rows), table)
+        return table
+
+    def add_tracks_batch(table):
+        for cd, (_, track_infos) in zip(table, rows):
+            PC.DataProcessor.add_tracks(track_infos, cd)
+
+    table = add_cds()
+    add_tracks(table)
+    cd_ids = [cd_info[0] for cd_info, _ in rows]
+    lookup_ids = [rnd.choice(cd_ids) for _ in range(lookups)]
+    shuffled = list(table)
+    rnd.shuffle(shuffled)
+    page_size = IO.ScreenIO.PAGE_SIZE
+    n_pages = max(1, -(-len(table) // page_size))
+    page_numbers = [1 + i * (n_pages - 1) // max(1, pages - 1) for i in range(pages)]
+
+    def select_cds():
+        for cd_id in lookup_ids:
+            PC.DataProcessor.select_cd(table, cd_id)
+
+    def show_pages():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for page in page_numbers:
+                IO.ScreenIO.show_inventory(table, page)
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_name = [os.path.join(folder, 'AlbumInventory.txt'), os.path.join(folder, 'TrackInventory.txt')]
+        IO.FileIO.save_inventory(file_name, table)
+        timings = {
+            'load_inventory': (n_albums, best_of(repeat, IO.FileIO.load_inventory, file_name)),
+            'save_inventory': (n_albums, best_of_setup(repeat, lambda: (file_name, IO.FileIO.load_inventory(file_name)),
+                                                       IO.FileIO.save_inventory)),
+            'save_inventory_cached': (n_albums, best_of(repeat, IO.FileIO.save_inventory, file_name, table)),
+        }
+    timings['add_CD'] = (n_albums, best_of(repeat, add_cds))
+    timings['add_CDs'] = (n_albums, best_of(repeat, add_cds_batch))
+    timings['add_track'] = (n_tracks, best_of_setup(repeat, lambda: (add_cds(),), add_tracks))
+    timings['add_tracks'] = (n_tracks, best_of_setup(repeat, lambda: (add_cds(),), add_tracks_batch))
+    for name, (ops, seconds) in bench_batch(rows, repeat).items():
+        timings[name] = (ops, seconds)
+    timings['select_cd'] = (lookups, best_of(repeat, select_cds))
+    timings['CD.sort'] = (n_albums, best_of(repeat, DC.CD.sort, shuffled))
+    timings['show_inventory'] = (pages, best_of(repeat, show_pages))
+    return {name: {'seconds': seconds, 'ops': ops, 'ops/s': ops / seconds if seconds else None}
+            for name, (ops, seconds) in timings.items()}
+
+
+def bench_batch(rows: list, repeat: int = 3, seed: int = 42) -> dict:
+    """Times add_CD and add_track called once per row against add_CDs and add_tracks called
+    once per batch, with the rows in random order as in an unsorted dump
+    Args:
+        rows (list): (cd_info, track_infos) as returned by generate_rows.
+        repeat (int): runs of every operation, the fastest one counts.
+        seed (int): seed for the shuffle.
+    Returns:
+        results (dict): (ops, seconds) keyed by operation.
+    """
+
+    rnd = random.Random(seed)
+    cd_infos = [cd_info for cd_info, _ in rows]
+    rnd.shuffle(cd_infos)
+    track_infos = [list(reversed(infos)) for _, infos in rows]
+    n_tracks = sum(len(infos) for infos in track_infos)
+
+    def add_cds_single():
+        table = DC.Inventory()
+        for cd_info in cd_infos:
+            PC.DataProcessor.add_CD(cd_info, table)
+
+    def empty_cds():
+        return ([DC.CD(*cd_info) for cd_info, _ in rows],)
+
+    def add_tracks_single(cds):
+        for cd, infos in zip(cds, track_infos):
+            for track_info in infos:
+                PC.DataProcessor.add_track(track_info, cd)
+            cd.cd_tracks  # the tracks are sorted on first use
+
+    def add_tracks_batch(cds):
+        for cd, infos in zip(cds, track_infos):
+            PC.DataProcessor.add_tracks(infos, cd)
+            cd.cd_tracks
+
+    def add_cds_batch():
+        PC.DataProcessor.add_CDs(cd_infos, DC.Inventory())
+
+    return {'add_CD_shuffled': (len(cd_infos), best_of(repeat, add_cds_single)),
+            'add_CDs_shuffled': (len(cd_infos), best_of(repeat, add_cds_batch)),
+            'add_track_reversed': (n_tracks, best_of_setup(repeat, empty_cds, add_tracks_single)),
+            'add_tracks_reversed': (n_tracks, best_of_setup(repeat, empty_cds, add_tracks_batch))}
+
+
+def _server_client(socket_path: str, client: int, cd_ids: list, n_requests: int, write_ratio: float, seed: int):
+    """One client process of bench_server
+    Returns:
+        latencies (tuple): seconds of every read and every write request.
+    """
+
+    rnd = random.Random(seed + client)
+    clock = time.perf_counter
+    reads = []
+    writes = []
+    storage = IS.ServerStorage(socket_path)
+    for i in range(n_requests):
+        cd_id = rnd.choice(cd_ids)
+        if rnd.random() < write_ratio:
+            # a position no other client and no generated track uses, so every write succeeds
+            line = 'T,{},{},Bench {},3:00\n'.format(cd_id, 10 ** 6 * (client + 1) + i, i)
+            start = clock()
+            storage.request('apply', [line])
+            writes.append(clock() - start)
+        else:
+            start = clock()
+            storage.request('get', cd_id)
+            reads.append(clock() - start)
+    storage.close()
+    return reads, writes
+
+
+def bench_server(n_albums: int, tracks_per_album: int, client_counts=(1, 2, 4, 8), n_requests: int = 2000,
+                 write_ratio: float = 0.1, seed: int = 42) -> dict:
+    """Times an InventoryServer over text files under N concurrent client processes, each sending
+    n_requests gets and journal applies (which save) of random CDs
+    Returns:
+        results (dict): requests/s and read and write latency p50 and p99 in milliseconds, keyed by
+        number of clients.
+    """
+
+    table = generate_inventory(n_albums, tracks_per_album, seed)
+    cd_ids = [disc.cd_id for disc in table]
+    context = multiprocessing.get_context('spawn')  # forking would copy the server's threads and locks
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        file_name = [os.path.join(folder, name)
+                     for name in ('AlbumInventory.txt', 'TrackInventory.txt', 'InventoryJournal.txt')]
+        IO.FileIO.save_inventory(file_name, table)
+        socket_path = os.path.join(folder, 'inventory.sock')
+        server = IS.InventoryServer(IO.TextFileStorage(file_name), socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            for clients in client_counts:
+                with context.Pool(clients) as pool:
+                    # start up the interpreters and import this module in every worker before timing
+                    pool.starmap(_server_client, [(socket_path, client, cd_ids, 0, 0, seed) for client in range(clients)])
+                    start = time.perf_counter()
+                    latencies = pool.starmap(_server_client, [
+                        (socket_path, client, cd_ids, n_requests, write_ratio, seed) for client in range(clients)])
+                    seconds = time.perf_counter() - start
+                result = {'requests/s': clients * n_requests / seconds}
+                for kind, samples in (('read', [x for reads, _ in latencies for x in reads]),
+                                      ('write', [x for _, writes in latencies for x in writes])):
+                    samples.sort()
+                    for key, fraction in (('p50', 0.5), ('p99', 0.99)):
+                        result['{}_{}_ms'.format(kind, key)] = (
+                            1000 * samples[min(len(samples) - 1, int(fraction * len(samples)))] if samples else None)
+                results[clients] = result
+        finally:
+            server.shutdown()
+            thread.join()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1, min_delta: float = 0.001) -> list:
+    """Compares the results of run_suite against a baseline run
+    Args:
+        results (dict): the current run.
+        baseline (dict): an earlier run, as written by run_suite.
+        threshold (float): relative slow down that counts as a regression.
+        min_delta (float): seconds an operation must lose before it counts, so timer noise on
+        operations that take microseconds is not reported.
+    Returns:
+        rows (list of tuples): (case, operation, baseline seconds, seconds, ratio, regression) for every
+        operation that is in both runs.
+    """
+
+    rows = []
+    for case, operations in results['cases'].items():
+        for name, result in operations.items():
+            try:
+                before = baseline['cases'][case][name]['seconds']
+            except KeyError:
+                continue
+            ratio = result['seconds'] / before if before else float('inf')
+            regression = ratio > 1 + threshold and result['seconds'] - before > min_delta
+            rows.append((case, name, before, result['seconds'], ratio, regression))
+    return rows
+
+
+def run_suite(sizes, tracks_per_album: int, seed: int = 42, sparsity: float = 0.0, max_tracks: int = None,
+              repeat: int = 3) -> dict:
+    """Runs bench_suite for every number of albums in sizes
+    Returns:
+        results (dict): the settings, the machine and the results keyed by case, ready for json.dump.
+    """
+
+    settings = {'sizes': list(sizes), 'tracks_per_album': tracks_per_album, 'max_tracks': max_tracks,
+                'sparsity': sparsity, 'seed': seed, 'repeat': repeat}
+    machine = {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+               'platform': platform.platform(), 'cpus': os.cpu_count()}
+    cases = {}
+    for n_albums in sizes:
+        case = '{}x{}'.format(n_albums, tracks_per_album if max_tracks is None
+                              else '{}-{}'.format(tracks_per_album, max_tracks))
+        cases[case] = bench_suite(n_albums, tracks_per_album, seed, sparsity, max_tracks, repeat)
+        print('{}:'.format(case), file=sys.stderr)
+        for name, result in cases[case].items():
+            print('  {:<22} {:9.4f} s {:>14,.0f} ops/s'.format(name, result['seconds'], result['ops/s'] or 0),
+                  file=sys.stderr)
+    return {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'settings': settings, 'machine': machine, 'cases': cases}
+
+
+def main(argv=None) -> int:
+    """Command line of the benchmark suite
+    Returns:
+        (int): exit code, 1 if an operation is slower than the baseline by more than the threshold.
+    """
+
+    parser = argparse.ArgumentParser(description='Times the hot paths of the CD Inventory on synthetic inventories.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='numbers of albums, one case each (default: 1000 10000 100000)')
+    parser.add_argument('--tracks', type=int, default=10, help='tracks per album, the least if --max-tracks is given')
+    parser.add_argument('--max-tracks', type=int, help='the most tracks per album, random counts in between')
+    parser.add_argument('--sparsity', type=float, default=0.0, help='chance that an album ID is left out')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per operation, the fastest one counts')
+    parser.add_argument('--output', help='file to write the JSON results to instead of stdout')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slow down that counts as a regression')
+    parser.add_argument('--min-delta', type=float, default=0.001,
+                        help='seconds an operation must lose to count as a regression')
+    parser.add_argument('--legacy', action='store_true',
+                        help='run the comparisons of the old against the new save and of parallel loading instead')
+    parser.add_argument('--server', type=int, nargs='+', metavar='CLIENTS',
+                        help='time an InventoryServer under these numbers of concurrent clients instead, '
+                             'on an inventory of the first of --sizes')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per client with --server')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='share of writes with --server')
+    args = parser.parse_args(argv)
+
+    if args.legacy:
+        run_legacy()
+        return 0
+    if args.server:
+        results = bench_server(args.sizes[0], args.tracks, args.server, args.requests, args.write_ratio, args.seed)
+        for clients, result in results.items():
+            print('  {:>3} clients {:>10,.0f} requests/s  read p50 {:.3f} / p99 {:.3f} ms'.format(
+                clients, result['requests/s'], result['read_p50_ms'] or 0, result['read_p99_ms'] or 0),
+                file=sys.stderr)
+        results = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'settings': vars(args), 'clients': results}
+    else:
+        results = run_suite(args.sizes, args.tracks, args.seed, args.sparsity, args.max_tracks, args.repeat)
+    regressions = 0
+    if args.baseline and not args.server:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        rows = compare(results, baseline, args.threshold, args.min_delta)
+        results['baseline'] = {'file': args.baseline, 'threshold': args.threshold, 'comparison': [
+            {'case': case, 'operation': name, 'baseline_seconds': before, 'seconds': seconds,
+             'ratio': ratio, 'regression': regression}
+            for case, name, before, seconds, ratio, regression in rows]}
+        print('against {}:'.format(args.baseline), file=sys.stderr)
+        for case, name, before, seconds, ratio, regression in rows:
+            print('  {:<14} {:<22} {:9.4f} s -> {:9.4f} s  x{:.2f}{}'.format(
+                case, name, before, seconds, ratio, '  REGRESSION' if regression else ''), file=sys.stderr)
+            regressions += regression
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 1 if regressions else 0
+
+
+def run_legacy() -> None:
+    """Prints the comparisons of the old against the new save and of parallel loading"""
+    for n_albums, tracks_per_album in ((10000, 10), (100000, 10)):
+        print('save_inventory, {} albums x {} tracks:'.format(n_albums, tracks_per_album))
+        for label, result in bench_save(n_albums, tracks_per_album).items():
+            print('  {:<10} {:8.3f} s {:8.1f} MB/s'.format(label, result['seconds'], result['MB/s']))
+    print('load_inventory, 30000 albums x 10 tracks, {} CPUs:'.format(os.cpu_count()))
+    for workers, result in bench_parallel_load(30000, 10).items():
+        print('  {} workers {:8.3f} s  x{:.2f}'.format(workers, result['seconds'], result['speedup']))
+    print('reload after a change, 50000 albums x 10 tracks:')
+    for name, seconds in bench_reload(50000, 10).items():
+        print('  {:<15} {:8.4f} s'.format(name, seconds))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,39 +7,102 @@
 # DBiesinger, 2030-Jan-02, Extended functionality to add tracks
 #------------------------------------------#
 
+import argparse
+import sys
+
 import ProcessingClasses as PC
 import IOClasses as IO
+import Instrumentation as IN
+import InventoryServer as IS
+
+objParser = argparse.ArgumentParser(description='The CD Inventory App')
+objParser.add_argument('--sqlite', metavar='DATABASE', help='keep the inventory in an SQLite database')
+objParser.add_argument('--server', metavar='SOCKET',
+                       help='work on the inventory of the InventoryServer.py listening on SOCKET')
+objParser.add_argument('--migrate', metavar='DATABASE',
+                       help='copy the inventory text files into an SQLite database and exit')
+objParser.add_argument('--batch', metavar='FILE',
+                       help='apply the operations in FILE (- for stdin), one JSON object per line, and exit')
+objArgs = objParser.parse_args()
 
-lstFileNames = ['AlbumInventory.txt', 'TrackInventory.txt']
-lstOfCDObjects = IO.FileIO.load_inventory(lstFileNames)
+lstFileNames = ['AlbumInventory.txt', 'TrackInventory.txt', 'InventoryJournal.txt']
+if objArgs.migrate:
+    with IO.SQLiteStorage(objArgs.migrate) as objStorage:
+        print('{} CD / Albums migrated to {}'.format(objStorage.import_text(lstFileNames), objArgs.migrate))
+    sys.exit()
+if objArgs.server:
+    objStorage = IS.ServerStorage(objArgs.server)
+elif objArgs.sqlite:
+    objStorage = IO.SQLiteStorage(objArgs.sqlite)
+else:
+    objStorage = IO.TextFileStorage(lstFileNames, 'InventorySnapshot.marshal')
+lstOfCDObjects = objStorage.load(lazy=True)
+if objArgs.batch:
+    objFile = sys.stdin if objArgs.batch == '-' else open(objArgs.batch, 'r')
+    with objFile:
+        dicReport = PC.BatchProcessor.run(objFile, lstOfCDObjects)
+    if dicReport['save']:
+        objStorage.save(lstOfCDObjects)
+    IO.ScreenIO.show_batch_report(dicReport)
+    objStorage.close()
+    sys.exit(1 if dicReport['errors'] else 0)
+
+objIndex = None  # search index, built on the first search so tracks are only read when needed
+bolProfileNext = False  # set by [p] [c] to profile the next menu operation
+bolProfiling = False
+objReload = None  # background reload started by [l], swapped in once it is done
 
 while True:
+    if bolProfiling:
+        print(IN.Instrumentation.stop_profile('InventoryProfile.prof'))
+        print('Full profile saved to InventoryProfile.prof')
+        bolProfiling = False
     IO.ScreenIO.print_menu()
     strChoice = IO.ScreenIO.menu_choice()
+    if bolProfileNext:
+        IN.Instrumentation.start_profile()
+        bolProfileNext = False
+        bolProfiling = True
+    if objReload is not None and objReload.done():
+        try:
+            lstOfCDObjects = objReload.result()  # one assignment swaps the whole inventory
+            objIndex = None
+            print('Inventory reloaded from file: {} CD / Albums.\n'.format(len(lstOfCDObjects)))
+        except Exception as e:
+            print(e)
+        objReload = None
 
     if strChoice == 'x':
         break
     if strChoice == 'l':
+        if objReload is not None:
+            print('The Inventory is already being reloaded.\n')
+            continue  # start loop back at top.
         print('WARNING: If you continue, all unsaved data will be lost and the Inventory re-loaded from file.')
+        print('Only what changed in the files is read again if the Inventory has no unsaved changes. Otherwise the')
+        print('reload runs in the background; changes made before it is done are lost as well.')
         strYesNo = input('type \'yes\' to continue and reload from file. otherwise reload will be canceled')
         if strYesNo.lower() == 'yes':
-            print('reloading...')
-            lstOfCDObjects = IO.FileIO.load_inventory(lstFileNames)
-            IO.ScreenIO.show_inventory(lstOfCDObjects)
+            if objStorage.reload(lstOfCDObjects):  # only re-reads what changed in the files
+                objIndex = None
+                print('Inventory brought up to date from file: {} CD / Albums.\n'.format(len(lstOfCDObjects)))
+                continue  # start loop back at top.
+            print('reloading in the background. The new Inventory is used once the reload is done.\n')
+            objReload = IO.BackgroundReload(lambda: objStorage.load_async(lazy=True))
         else:
             input('canceling... Inventory data NOT reloaded. Press [ENTER] to continue to the menu.')
             IO.ScreenIO.show_inventory(lstOfCDObjects)
         continue  # start loop back at top.
     elif strChoice == 'a':
         tplCdInfo = IO.ScreenIO.get_CD_info(lstOfCDObjects)
-        PC.DataProcessor.add_CD(tplCdInfo, lstOfCDObjects)
-        IO.ScreenIO.show_inventory(lstOfCDObjects)
+        PC.DataProcessor.add_CD(tplCdInfo, lstOfCDObjects, objIndex)
+        IO.ScreenIO.show_inventory(lstOfCDObjects, IO.ScreenIO.page_of(lstOfCDObjects, tplCdInfo[0]))
         continue  # start loop back at top.
     elif strChoice == 'd':
-        IO.ScreenIO.show_inventory(lstOfCDObjects)
+        IO.ScreenIO.browse_inventory(lstOfCDObjects)
         continue  # start loop back at top.
     elif strChoice == 'c':
-        IO.ScreenIO.show_inventory(lstOfCDObjects)
+        IO.ScreenIO.browse_inventory(lstOfCDObjects)
         while True:
             try:
                 cd_idx = int(input('Select the CD / Album index: '))
@@ -52,30 +115,79 @@ while True:
             strChoice = IO.ScreenIO.menu_CD_choice()
             if strChoice == 'x':
                 break
-            elif strChoice == 'a':
-                track_info = IO.ScreenIO.get_track_info(cd)
-                PC.DataProcessor.add_track(track_info, cd) 
-            elif strChoice == 'd':
-                IO.ScreenIO.show_tracks(cd)
+            try:  # the tracks of a lazily loaded CD are read now, from a file that may have changed since
+                if strChoice == 'a':
+                    track_info = IO.ScreenIO.get_track_info(cd)
+                    PC.DataProcessor.add_track(track_info, cd, objIndex)
+                elif strChoice == 'd':
+                    IO.ScreenIO.browse_tracks(cd)
+                elif strChoice == 'r':
+                    IO.ScreenIO.show_tracks(cd)
+                    while True:
+                        try:
+                            trk_idx = int(input('Select the Track index: '))
+                            break
+                        except ValueError:
+                            print('Invalid Input! Try again.')
+                    PC.DataProcessor.rmv_track(trk_idx, cd, objIndex)
+                else:
+                    print('General Error')
+            except Exception as e:
+                print(e)
+    elif strChoice == 'f':
+        strQuery = input('Search for (start of words in titles or artists): ').strip()
+        try:
+            if objIndex is None:
+                objIndex = PC.SearchIndex(lstOfCDObjects)
+            IO.ScreenIO.show_search_results(lstOfCDObjects, objIndex.search(strQuery))
+        except Exception as e:
+            print(e)
+        continue  # start loop back at top.
+    elif strChoice == 't':
+        try:
+            IO.ScreenIO.show_statistics(PC.CatalogueStats(lstOfCDObjects))
+        except Exception as e:
+            print(e)
+        continue  # start loop back at top.
+    elif strChoice == 'p':
+        while True:
+            IO.ScreenIO.show_instrumentation(IN.Instrumentation.report(), IN.Instrumentation.is_enabled())
+            strChoice = IO.ScreenIO.instrumentation_choice()
+            if strChoice == 'x':
+                break
+            elif strChoice == 'e':
+                if IN.Instrumentation.is_enabled():
+                    IN.Instrumentation.disable()
+                else:
+                    IN.Instrumentation.enable()
             elif strChoice == 'r':
-                IO.ScreenIO.show_tracks(cd)
-                while True:
-                    try:
-                        trk_idx = int(input('Select the Track index: '))
-                        break
-                    except ValueError:
-                        print('Invalid Input! Try again.')
-                cd.rmv_track(trk_idx)
-            else:
-                print('General Error')
+                IN.Instrumentation.reset()
+            elif strChoice == 'w':
+                strFileName = input('File name [InventoryStats.json]: ').strip() or 'InventoryStats.json'
+                try:
+                    IN.Instrumentation.dump(strFileName)
+                    print('Statistics written to', strFileName)
+                except OSError as e:
+                    print(e)
+            elif strChoice == 'c':
+                bolProfileNext = True
+                print('The next menu operation will be profiled.')
+                break
+        continue  # start loop back at top.
     elif strChoice == 's':
         IO.ScreenIO.show_inventory(lstOfCDObjects)
-        strYesNo = input('Save this inventory to file? [y/n] ').strip().lower()
+        strYesNo = input('Save this inventory to file? [y/n, c to save and compact the journal] ').strip().lower()
+        if strYesNo in ('y', 'c') and objReload is not None:
+            objReload = None  # it would bring back the inventory as it was before this save
+            print('The background reload was canceled.')
         if strYesNo == 'y':
-            IO.FileIO.save_inventory(lstFileNames, lstOfCDObjects)
+            objStorage.save(lstOfCDObjects)
+        elif strYesNo == 'c':
+            objStorage.save_all(lstOfCDObjects)
         else:
             input('The inventory was NOT saved to file. Press [ENTER] to return to the menu.')
         continue  # start loop back at top.
     else:
         print('General Error')
-        
+
+objStorage.close()
@@ -9,24 +9,204 @@
 if __name__ == '__main__':
     raise Exception('This file is not meant to run by itself')
 
+import bisect
+import functools
+import heapq
+import sys
+import threading
+
+# lookups of rendered records in the caches of CD and Track objects
+RENDER_STATS = {'hits': 0, 'misses': 0}
+
+
+def _gaps(ids):
+    """Generator over the missing ranges in a sorted sequence of IDs / positions
+    Args:
+        ids (iterable of int): IDs in ascending order, numbering starts at 1.
+    Returns:
+        (first, last) (tuple of int): first and last missing ID of each gap.
+    """
+
+    expected = 1
+    for i in ids:
+        if i > expected:
+            yield expected, i - 1
+        expected = i + 1
+
+
+def parse_length(length):
+    """Converts a track length such as '59', '03:25' or '1:02:03' into seconds
+    Args:
+        length (string): length / playtime of a track.
+    Returns:
+        seconds (int): the length in seconds, None if length is not in one of these formats.
+    """
+
+    if type(length) != str:
+        return None
+    parts = length.strip().split(':')
+    if len(parts) > 3 or not all(part.isdecimal() for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_seconds(seconds):
+    """Returns: (string) seconds formatted as 'm:ss' or 'h:mm:ss'"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+    return '{}:{:02d}'.format(minutes, seconds)
+
+
+class IdAllocator:
+    """Finds the lowest free ID (or position) from 1 up without scanning the used ones:
+    IDs above the high-water mark are all free. Below it, the gaps left by take() and the IDs handed
+    back by release() are kept as (first, last) ranges in a min-heap. An ID that was taken again since
+    is only noticed, and skipped, when it comes up at the top of the heap, so every method is O(1)
+    amortized (O(log n) for the heap).
+    methods:
+        take(i): Records that i is used -> None
+        release(i): Records that i is free again -> None
+        next_free() -> (int) the lowest free ID
+    """
+
+    __slots__ = ('__used', '__free', '__high')
+
+    ###    Constructor    ###
+    def __init__(self, used) -> None:
+        """Creates an allocator over used, a set or dict of the IDs in use that it checks but does not change"""
+        ###    Attributes    ###
+        self.__used = used
+        self.__free = []  # heap of (first, last) ranges that were free when they were pushed
+        self.__high = 0  # highest ID taken so far
+        for i in sorted(used):
+            self.take(i)
+
+    ###    Methods    ###
+    def take(self, i: int) -> None:
+        if i > self.__high:
+            if i > self.__high + 1:
+                heapq.heappush(self.__free, (self.__high + 1, i - 1))
+            self.__high = i
+
+    def release(self, i: int) -> None:
+        if 0 < i <= self.__high:
+            heapq.heappush(self.__free, (i, i))
+
+    def next_free(self) -> int:
+        free = self.__free
+        while free:
+            first, last = free[0]
+            if first > last:
+                heapq.heappop(free)
+            elif first in self.__used:
+                heapq.heapreplace(free, (first + 1, last))
+            else:
+                return first
+        return self.__high + 1
+
+
+class SymbolTable:
+    """Dictionary encoding of a text field whose values repeat, such as the artist of a CD:
+    Every distinct string gets an integer code, from 0 up in the order it is first seen, and is kept
+    once. intern() returns that one copy, so equal values share a single string object, and objects
+    can be grouped by code instead of by comparing and hashing the strings.
+    methods:
+        intern(value): -> (str) the shared copy of value
+        code(value): -> (int) the code of value, added to the table if it is new
+        string(code): -> (str) the value with code
+        strings(): -> (list) all values, each at the index of its code
+    """
+
+    __slots__ = ('__codes', '__strings', '__lock')
+
+    ###    Constructor    ###
+    def __init__(self, strings=()) -> None:
+        """Creates a symbol table holding strings, with codes in the order given"""
+        ###    Attributes    ###
+        self.__codes = {}  # string -> code
+        self.__strings = []  # code -> string
+        self.__lock = threading.Lock()  # a background reload adds values while the menu does too
+        for value in strings:
+            self.code(value)
+
+    ###    Methods    ###
+    def code(self, value: str) -> int:
+        code = self.__codes.get(value)
+        if code is None:
+            with self.__lock:
+                code = self.__codes.get(value)
+                if code is None:
+                    code = len(self.__strings)
+                    self.__strings.append(value)
+                    self.__codes[value] = code
+        return code
+
+    def intern(self, value: str) -> str:
+        return self.__strings[self.code(value)]
+
+    def string(self, code: int) -> str:
+        return self.__strings[code]
+
+    def strings(self) -> list:
+        return list(self.__strings)
+
+    def __len__(self) -> int:
+        return len(self.__strings)
+
+    def __contains__(self, value) -> bool:
+        return value in self.__codes
+
+
+# the most distinct artists and distinct lengths kept shared; the least recently used ones beyond it
+# are let go, so a long running process does not keep every value it ever saw. Track titles are
+# mostly distinct, so they go through sys.intern instead, which lets go of titles no track uses any more
+SHARED_LIMIT = 1 << 14
+
+
+@functools.lru_cache(maxsize=SHARED_LIMIT)
+def _shared_artist(artist: str) -> str:
+    """Returns: (str) the copy of artist that CDs share"""
+    return artist
+
+
+@functools.lru_cache(maxsize=SHARED_LIMIT)
+def _shared_length(length: str) -> tuple:
+    """Returns: (tuple) the copy of length that tracks share and parse_length(length), parsed once"""
+    return length, parse_length(length)
+
 
 class Track():
     """Stores Data about a single Track:
     properties:
         position: (int) with Track position on CD / Album
         title: (str) with Track title
-        length: (str) with length / playtime of Track
+        length: (str) with length / playtime of Track, as entered
+        seconds: (int) with length / playtime of Track in seconds, None if length could not be parsed
     methods:
         __str__(): -> (str) with position, title and length of a track formated for screen display
         get_record() -> (str) with position, title and length of a track formated for saving to file
     """
 
+    # no per instance __dict__: a Track only needs room for its attributes
+    # _owner is the CD holding the track, told about changes so it can record them for saving
+    __slots__ = ('__position', '__title', '__length', '__seconds', '__record', '_owner')
+
     ###    Constructor    ###
     def __init__(self, p, t, l):
         #Attributes#
         self.__position = p
-        self.__title = t
-        self.__length = l
+        self.__title = sys.intern(t) if type(t) == str else t
+        if type(l) == str:
+            self.__length, self.__seconds = _shared_length(l)
+        else:
+            self.__length, self.__seconds = l, None
+        self.__record = None  # cached get_record result
+        self._owner = None
 
     ###    Properties    ###
     @property
@@ -38,7 +218,11 @@ class Track():
         if type(p) == int:
             if p < 1:
                 raise Exception('Track position must be greater than 0')
+            old_position = self.__position
             self.__position = p
+            self.__record = None
+            if self._owner is not None:
+                self._owner._track_changed(self, old_position)
         else:
             raise Exception('Track position must be an integer')
 
@@ -49,7 +233,10 @@ class Track():
     @title.setter
     def title(self, t):
         if type(t) == str:
-            self.__title = t
+            self.__title = sys.intern(t)
+            self.__record = None
+            if self._owner is not None:
+                self._owner._track_changed(self, self.__position)
         else:
             raise Exception('Track title must be a string')
 
@@ -60,18 +247,45 @@ class Track():
     @length.setter
     def length(self, l):
         if type(l) == str:
-            self.__length = l
+            self.__length, self.__seconds = _shared_length(l)
+            self.__record = None
+            if self._owner is not None:
+                self._owner._track_changed(self, self.__position)
         else:
             raise Exception('Track length must be a string')
 
+    @property
+    def seconds(self):
+        return self.__seconds
+
     ###    Methods    ###
     def __str__(self) -> str:
         """Returns Track details as formatted string"""
         return '{}. {} ({})'.format(self.position, self.title, self.length)
 
     def get_record(self) -> str:
-        """Returns: Track record formatted for saving to file"""
-        return '{},{},{}\n'.format(self.position, self.title, self.length)
+        """Returns: Track record formatted for saving to file, cached until the track changes"""
+        if self.__record is None:
+            RENDER_STATS['misses'] += 1
+            self.__record = '{},{},{}\n'.format(self.__position, self.__title, self.__length)
+        else:
+            RENDER_STATS['hits'] += 1
+        return self.__record
+
+
+class _CDExtra:
+    """The state of a CD / Album that most CDs never need, kept out of the CD object so it stays small:
+    created by the CD the first time it needs one of these attributes."""
+
+    __slots__ = ('dirty_tracks', 'render', 'positions', 'tracks_sorted')
+
+    ###    Constructor    ###
+    def __init__(self) -> None:
+        ###    Attributes    ###
+        self.dirty_tracks = None  # set of changed positions
+        self.render = None  # cached records and listings
+        self.positions = None  # IdAllocator of the free positions
+        self.tracks_sorted = True
 
 
 class CD:
@@ -80,18 +294,34 @@ class CD:
         cd_id: (int) with CD  / Album ID
         cd_title: (string) with the title of the CD / Album
         cd_artist: (string) with the artist of the CD / Album
-        cd_tracks: (list) with track objects of the CD / Album
+        cd_tracks: (list) with track objects of the CD / Album, ordered by position
+        is_dirty: (bool) True if the CD / Album changed since it was last saved
     methods:
         __str__: -> (string) of a CD album formatted as we want
         get_record() -> (string) CD record formatted for saving to file
         add_track(object) Track object to be added to CD / Album. -> None
+        add_tracks(list) Track objects to be added to CD / Album with a single sort. -> None
         rmv_track(int) Removes the track identified by track_id from Album -> None
-        sort(list) -> tmp_cd A list containing the sorted cd tuples
-        sort_tracks(): Sorts the tracks using Track.position. Fills blanks with None
+        sort(list) -> tmp_cd A list containing the CD objects sorted by ID
+        sort_tracks(): Sorts the tracks using Track.position
+        track_gaps() -> generator of (first, last) ranges of positions without a track
+        has_track(int) -> (bool) True if a track is stored at this position
+        next_free_position() -> (int) the lowest position without a track
         get_tracks() -> (string) formatted string of tracks
         get_long_record() -> (string) Formatted information about album and its tracks
+        get_track_records() -> (string) track records of the CD / Album formatted for saving to file
+        peek_track_records() -> (string) the same, read from the track source if the tracks are not loaded yet
+        get_changes() -> (tuple) header changed flag and the changed track positions
+        mark_dirty(): Marks the album and all its tracks as changed -> None
+        mark_clean(): Forgets all changes, after the CD / Album was saved -> None
+        set_track_source(source): Loads the tracks from source.load_tracks(cd_id) on first use -> None
+        get_track_source(): -> the source set_track_source set, None once the tracks are loaded
     """
 
+    # _owner is the Inventory holding the CD, told about changes so it can record them for saving
+    # the rest of its state is in a _CDExtra, only created when the CD needs it
+    __slots__ = ('__cd_id', '__cd_title', '__cd_artist', '__tracks', '__dirty', '__extra', '_owner')
+
     ###    Constructor    ###
     def __init__(self, cd_id: int, cd_title: str, cd_artist: str) -> None:
         """Set ID, Title and Artist of a new CD Object"""
@@ -99,8 +329,11 @@ class CD:
         try:
             self.__cd_id = int(cd_id)
             self.__cd_title = str(cd_title)
-            self.__cd_artist = str(cd_artist)
-            self.__tracks = []
+            self.__cd_artist = _shared_artist(str(cd_artist))
+            self.__tracks = {}  # position -> Track, or the track source while the tracks are not loaded
+            self.__dirty = True
+            self.__extra = None  # _CDExtra, created on first use
+            self._owner = None
         except Exception as e:
             raise Exception('Error setting initial values:\n' + str(e))
 
@@ -113,9 +346,15 @@ class CD:
     @cd_id.setter
     def cd_id(self, value):
         try:
-            self.__cd_id = int(value)
+            value = int(value)
         except Exception:
             raise Exception('ID needs to be Integer')
+        self.__load_tracks()
+        old_id = self.__cd_id
+        if self._owner is not None and value != old_id:
+            self._owner._cd_rekeyed(self, old_id, value)
+        self.__cd_id = value
+        self.mark_dirty()
 
     # CD title
     @property
@@ -128,6 +367,7 @@ class CD:
             self.__cd_title = str(value)
         except Exception:
             raise Exception('Title needs to be String!')
+        self.__changed(None)
 
     # CD artist
     @property
@@ -137,23 +377,36 @@ class CD:
     @cd_artist.setter
     def cd_artist(self, value):
         try:
-            self.__cd_artist = str(value)
+            self.__cd_artist = _shared_artist(str(value))
         except Exception:
             raise Exception('Artist needs to be String!')
+        self.__changed(None)
 
     # CD tracks
     @property
     def cd_tracks(self):
-        """Returns: Tracks details as formatted string"""
-        return self.__tracks
+        """Returns: list of Track objects ordered by position"""
+        self.__sort_tracks()
+        return list(self.__tracks.values())
     
     @cd_tracks.setter
     def cd_tracks(self, value):
-        try:
-            self.__cd_tracks = list
-        except Exception:
+        if type(value) != list:
             raise Exception('Track needs to be list!')
-    
+        self.__load_tracks()
+        for position, track in self.__tracks.items():
+            track._owner = None
+            self.__changed(position)
+        self.__tracks = {}
+        if self.__extra is not None:
+            self.__extra.tracks_sorted = True
+            self.__extra.positions = None
+        self.add_tracks(value)
+
+    @property
+    def is_dirty(self):
+        return self.__dirty or (self.__extra is not None and bool(self.__extra.dirty_tracks))
+
 
     ###    Methods    ###
     def __str__(self):
@@ -162,7 +415,45 @@ class CD:
 
     def get_record(self):
         """Returns: CD record formatted for saving to file"""
-        return '{},{},{}\n'.format(self.cd_id, self.cd_title, self.cd_artist)
+        return self.__cached('record', lambda: '{},{},{}\n'.format(self.__cd_id, self.__cd_title, self.__cd_artist))
+
+    def get_track_records(self) -> str:
+        """Returns: (string) records of all tracks, each prefixed with the CD ID, formatted for saving to file"""
+        prefix = '{},'.format(self.__cd_id)
+        return self.__cached('track_records',
+                             lambda: ''.join([prefix + track.get_record() for track in self.cd_tracks]))
+
+    def peek_track_records(self) -> str:
+        """Returns: (string) the records get_track_records would return, taken as stored from the track
+        source if the tracks were not loaded yet and the source has load_records(cd_id). The tracks stay
+        unloaded, so the records of a whole lazily loaded inventory can be copied without parsing them."""
+        source = self.get_track_source()
+        if source is not None and hasattr(source, 'load_records'):
+            return source.load_records(self.__cd_id)
+        return self.get_track_records()
+
+    def __more(self):
+        """Returns: (_CDExtra) the less used state of the CD / Album, created on the first call"""
+        if self.__extra is None:
+            self.__extra = _CDExtra()
+        return self.__extra
+
+    def __cached(self, key, render):
+        """Returns the rendered string stored under key, rendering and storing it on a miss
+        The cache is cleared by every change of the CD / Album or its tracks, see __changed.
+        """
+
+        extra = self.__more()
+        if extra.render is None:
+            extra.render = {}
+        try:
+            value = extra.render[key]
+        except KeyError:
+            RENDER_STATS['misses'] += 1
+            value = extra.render[key] = render()
+        else:
+            RENDER_STATS['hits'] += 1
+        return value
 
     def add_track(self, track: Track) -> None:
         """Adds a track to the CD / Album
@@ -172,51 +463,188 @@ class CD:
             None.
         """
 
-        self.__tracks.append(track)
+        self.__insert_track(track)
+
+    def add_tracks(self, tracks) -> None:
+        """Adds several tracks to the CD / Album and sorts them once at the end
+        Args:
+            tracks (iterable of Track): Track objects to be added to CD / Album.
+        Returns:
+            None.
+        """
+
+        self.__load_tracks()
+        positions = [self.__store_track(track) for track in tracks]
+        if positions:
+            self.__changed(positions)
         self.__sort_tracks()
 
     def rmv_track(self, track_id: int) -> None:
         """Removes the track identified by track_id from Album
         Args:
-            track_id (int): ID of track to be removed.
+            track_id (int): position of track to be removed.
+        Raises:
+            Exception: If there is no track at this position.
         Returns:
             None.
         """
 
-        del self.__tracks[track_id - 1]
-        self.__sort_tracks()
+        self.__load_tracks()
+        try:
+            track = self.__tracks.pop(track_id)
+        except KeyError:
+            raise Exception('Track does not exist')
+        track._owner = None
+        if self.__extra is not None and self.__extra.positions is not None:
+            self.__extra.positions.release(track_id)
+        self.__changed(track_id)
 
     @staticmethod
     def sort(table):
-        """Sorts the tracks using cd.cd_id. Fills blanks with None
+        """Sorts the CDs using cd.cd_id. Gaps in the IDs take up no space
         Args:
-            table (list of tuples): A 2D list of tuples containing the CD album data
+            table (iterable of CD objects): the CD album data
         Returns:
-            tmp_cd (list): A list containing the sorted cd tuples
-        
+            tmp_cd (list): A list containing the CD objects sorted by ID
         """
-        n = len(table)
-        for cd in table:
-            if (cd is not None) and (n < cd.cd_id):
-                n = cd.cd_id
-        tmp_cd = [None] * n
-        for cd in table:
-            if cd is not None:
-                tmp_cd[cd.cd_id - 1] = cd
-        return tmp_cd
 
+        if isinstance(table, Inventory):
+            return list(table.ordered())
+        return sorted((cd for cd in table if cd is not None), key=lambda cd: cd.cd_id)
+
+    def set_track_source(self, source) -> None:
+        """Defers loading the tracks until they are first used
+        Args:
+            source (object): has a method load_tracks(cd_id) returning the list of Track objects,
+                None to forget the source of tracks not loaded yet.
+        Raises:
+            Exception: If source is given and the CD / Album already holds tracks.
+        Returns:
+            None.
+        """
+
+        if type(self.__tracks) is not dict:
+            self.__tracks = source if source is not None else {}
+        elif source is not None:
+            if self.__tracks:
+                raise Exception('The tracks of CD {} are already loaded'.format(self.__cd_id))
+            self.__tracks = source
+
+    def get_track_source(self):
+        """Returns: the track source the tracks will be loaded from, None if they are loaded"""
+        return self.__tracks if type(self.__tracks) is not dict else None
+
+    def __load_tracks(self):
+        """Loads the tracks from the track source, if they were not loaded yet"""
+        if type(self.__tracks) is dict:
+            return
+        tracks = self.__tracks.load_tracks(self.__cd_id)
+        self.__tracks = {}  # only once they are loaded, a failed load is tried again on the next use
+        for track in tracks:
+            if self.__tracks and track.position < next(reversed(self.__tracks)):
+                self.__more().tracks_sorted = False
+            self.__tracks[track.position] = track
+            track._owner = self
+
+    def __insert_track(self, track):
+        """Stores a track under its position, replacing any track already there"""
+        self.__load_tracks()
+        self.__changed(self.__store_track(track))
+
+    def __store_track(self, track):
+        """Stores a track under its position without recording the change, returns the position"""
+        if self.__tracks and track.position < next(reversed(self.__tracks)):
+            self.__more().tracks_sorted = False
+        old_track = self.__tracks.get(track.position)
+        if old_track is not None:
+            old_track._owner = None
+        self.__tracks[track.position] = track
+        track._owner = self
+        if self.__extra is not None and self.__extra.positions is not None:
+            self.__extra.positions.take(track.position)
+        return track.position
+
+    def __changed(self, position):
+        """Records a change of the album header (position None), of the track at position
+        or of the tracks at a list of positions"""
+        if position is None:
+            self.__dirty = True
+            if self.__extra is not None:
+                self.__extra.render = None
+        else:
+            extra = self.__more()
+            if extra.render is not None:
+                for key in ('tracks', 'long', 'track_records'):
+                    extra.render.pop(key, None)
+            positions = position if type(position) == list else (position,)
+            if extra.dirty_tracks is None:
+                extra.dirty_tracks = set(positions)
+            else:
+                extra.dirty_tracks.update(positions)
+        if self._owner is not None:
+            self._owner._cd_changed(self)
+
+    def _track_changed(self, track, old_position):
+        """Called by a Track of this CD after one of its attributes changed"""
+        if track.position != old_position:
+            if self.__tracks.get(old_position) is track:
+                del self.__tracks[old_position]
+                if self.__extra is not None and self.__extra.positions is not None:
+                    self.__extra.positions.release(old_position)
+                self.__changed(old_position)
+            self.__insert_track(track)
+        else:
+            self.__changed(track.position)
+
+    def get_changes(self):
+        """Returns the changes since the CD / Album was last saved
+        Returns:
+            (header, positions) (tuple): header (bool) True if ID, title or artist changed,
+            positions (list) sorted positions of tracks that were added, changed or removed.
+        """
+
+        dirty_tracks = self.__extra.dirty_tracks if self.__extra is not None else None
+        return self.__dirty, sorted(dirty_tracks or ())
+
+    def mark_dirty(self) -> None:
+        """Marks the album header and all its tracks as changed"""
+        self.__load_tracks()
+        for position in self.__tracks:
+            self.__changed(position)
+        self.__changed(None)
+
+    def mark_clean(self) -> None:
+        """Forgets all changes, after the CD / Album was saved"""
+        self.__dirty = False
+        if self.__extra is not None:
+            self.__extra.dirty_tracks = None
 
     def __sort_tracks(self):
-        """Sorts the tracks using Track.position. Fills blanks with None"""
-        n = len(self.__tracks)
-        for track in self.__tracks:
-            if (track is not None) and (n < track.position):
-                n = track.position
-        tmp_tracks = [None] * n
-        for track in self.__tracks:
-            if track is not None:
-                tmp_tracks[track.position - 1] = track
-        self.__tracks = tmp_tracks
+        """Sorts the tracks using Track.position, only if they are out of order"""
+        self.__load_tracks()
+        extra = self.__extra
+        if extra is not None and not extra.tracks_sorted:
+            self.__tracks = dict(sorted(self.__tracks.items()))
+            extra.tracks_sorted = True
+            extra.positions = None  # it checked the old dict, rebuilt on the next next_free_position
+
+    def track_gaps(self):
+        """Returns: generator of (first, last) ranges of positions without a track"""
+        self.__sort_tracks()
+        return _gaps(self.__tracks)
+
+    def next_free_position(self) -> int:
+        """Returns: (int) the lowest position from 1 up without a track"""
+        self.__load_tracks()
+        extra = self.__more()
+        if extra.positions is None:
+            extra.positions = IdAllocator(self.__tracks)
+        return extra.positions.next_free()
+
+    def has_track(self, position: int) -> bool:
+        """Returns: (bool) True if the CD / Album has a track at position"""
+        self.__load_tracks()
+        return position in self.__tracks
 
     def get_tracks(self) -> str:
         """Returns a string list of the tracks saved for the Album
@@ -226,16 +654,23 @@ class CD:
             result (string):formatted string of tracks.
         """
 
+        return self.__cached('tracks', self.__render_tracks)
+
+    def __render_tracks(self):
+        """Returns: (string) the formatted track listing for get_tracks"""
         self.__sort_tracks()
         if len(self.__tracks) < 1:
             raise Exception('No tracks saved for this Album')
-        result = ''
-        for track in self.__tracks:
-            if track is None:
-                result += 'No Information for this track\n'
-            else:
-                result += str(track) + '\n'
-        return result
+        lines = []
+        expected = 1
+        for position, track in self.__tracks.items():
+            if position == expected + 1:
+                lines.append('No Information for this track\n')
+            elif position > expected:
+                lines.append('No Information for tracks {} - {}\n'.format(expected, position - 1))
+            lines.append(str(track) + '\n')
+            expected = position + 1
+        return ''.join(lines)
 
     def get_long_record(self) -> str:
         """gets a formatted long record of the Album: Album information plus track details
@@ -243,10 +678,212 @@ class CD:
             result (string): Formatted information about album and its tracks.
         """
 
-        result = self.get_record() + '\n'
-        result += self.get_tracks() + '\n'
-        return result
+        return self.__cached('long', lambda: ''.join((self.get_record(), '\n', self.get_tracks(), '\n')))
+
+
+class Inventory:
+    """Stores the CD / Album objects of the inventory, indexed by CD ID:
+    properties:
+        None.
+    methods:
+        __len__() -> (int) number of CD / Albums in the inventory
+        __iter__() -> iterator over the CD objects in the order they were added
+        __contains__(cd_id) -> (bool) True if a CD with ID cd_id is in the inventory
+        ordered() -> iterator over the CD objects ordered by ID
+        page(start, count) -> (list) count CD objects ordered by ID, from the start-th on
+        index_of(cd_id) -> (int) place of the first CD with an ID of at least cd_id in the ID order
+        get_changes() -> (tuple) changed CD objects and IDs of removed CDs since the last save
+        is_new(cd_id) -> (bool) True if the CD with ID cd_id was added since the last save
+        mark_clean(): Forgets all changes, after the inventory was saved -> None
+        gaps() -> generator of (first, last) ranges of IDs without a CD
+        append(cd): Adds a CD object to the inventory -> None
+        extend(cds): Adds several CD objects with one ordering pass -> None
+        get_cd(cd_id) -> (CD) CD object with ID cd_id
+        remove(cd_id): Removes the CD with ID cd_id from the inventory -> None
+        next_free_id() -> (int) the lowest ID from 1 up without a CD
+    """
+
+    ###    Constructor    ###
+    def __init__(self, cds=()) -> None:
+        """Creates an Inventory, optionally filled with the CD objects in cds"""
+        ###    Attributes    ###
+        self.__cds = {}
+        self.__ids = []  # sorted IDs, one entry per CD
+        self.__dirty = set()  # IDs of CDs added or changed since the last save
+        self.__removed = set()  # IDs of CDs removed since the last save
+        self.__added = set()  # IDs of CDs added since the last save
+        self.__free_ids = IdAllocator(self.__cds)
+        for cd in cds:
+            self.append(cd)
+
+    ###    Methods    ###
+    def __len__(self) -> int:
+        return len(self.__cds)
+
+    def __iter__(self):
+        return iter(self.__cds.values())
+
+    def __contains__(self, cd_id) -> bool:
+        return cd_id in self.__cds
+
+    def __repr__(self) -> str:
+        return 'Inventory({})'.format(list(self.__cds.values()))
+
+    def ordered(self):
+        """Returns: iterator over the CD objects ordered by ID"""
+        return (self.__cds[cd_id] for cd_id in self.__ids)
 
+    def page(self, start: int, count: int) -> list:
+        """Returns: (list) count CD objects in ID order, starting with the start-th (from 0)"""
+        return [self.__cds[cd_id] for cd_id in self.__ids[max(start, 0):max(start, 0) + count]]
+
+    def index_of(self, cd_id: int) -> int:
+        """Returns: (int) place of the first CD with an ID of at least cd_id in the ID order"""
+        return bisect.bisect_left(self.__ids, cd_id)
+
+    def gaps(self):
+        """Returns: generator of (first, last) ranges of IDs without a CD"""
+        return _gaps(self.__ids)
+
+    def append(self, cd: CD) -> None:
+        """Adds a CD / Album to the inventory
+        Args:
+            cd (CD): CD object to be added.
+        Raises:
+            Exception: If a CD with the same ID is already in the inventory.
+        Returns:
+            None.
+        """
+
+        if cd.cd_id in self.__cds:
+            raise Exception('Album with ID {} already exists'.format(cd.cd_id))
+        self.__insert(cd)
+        cd._owner = self
+        self.__dirty.add(cd.cd_id)
+        self.__added.add(cd.cd_id)
+        if cd.cd_id in self.__removed:
+            # the removal is saved first, so the new CD has to be saved with all its tracks
+            cd.mark_dirty()
+
+    def extend(self, cds) -> None:
+        """Adds several CD / Albums to the inventory, sorting the ID list once instead of per CD
+        Nothing is added if any of the IDs is taken or repeated.
+        Args:
+            cds (iterable of CD): CD objects to be added.
+        Raises:
+            Exception: Listing every ID that is already in the inventory or repeated in cds.
+        Returns:
+            None.
+        """
+
+        cds = list(cds)
+        ids = [cd.cd_id for cd in cds]
+        if len(set(ids)) != len(ids) or not self.__cds.keys().isdisjoint(ids):
+            seen = set()
+            errors = []
+            for cd_id in ids:
+                if cd_id in self.__cds:
+                    errors.append('Album with ID {} already exists'.format(cd_id))
+                elif cd_id in seen:
+                    errors.append('Album ID {} is repeated'.format(cd_id))
+                seen.add(cd_id)
+            raise Exception('\n'.join(errors))
+        for cd in cds:
+            self.__cds[cd.cd_id] = cd
+            cd._owner = self
+            self.__free_ids.take(cd.cd_id)
+        self.__ids.extend(ids)
+        self.__ids.sort()  # a merge of two sorted runs if the batch is in ID order
+        self.__dirty.update(ids)
+        self.__added.update(ids)
+        for cd_id in self.__removed.intersection(ids):
+            # the removal is saved first, so the new CD has to be saved with all its tracks
+            self.__cds[cd_id].mark_dirty()
+
+    def __insert(self, cd):
+        """Stores cd under its ID and keeps the sorted ID list up to date"""
+        self.__cds[cd.cd_id] = cd
+        self.__free_ids.take(cd.cd_id)
+        if not self.__ids or cd.cd_id > self.__ids[-1]:
+            self.__ids.append(cd.cd_id)
+        else:
+            bisect.insort(self.__ids, cd.cd_id)
+
+    def get_cd(self, cd_id: int) -> CD:
+        """Returns the CD / Album with the ID cd_id
+        Args:
+            cd_id (int): ID of the CD object to return.
+        Raises:
+            Exception: If there is no CD with this ID.
+        Returns:
+            cd (CD): CD object that matches cd_id.
+        """
+
+        try:
+            return self.__cds[cd_id]
+        except KeyError:
+            raise Exception('CD does not exist')
+
+    def remove(self, cd_id: int) -> None:
+        """Removes the CD / Album with the ID cd_id from the inventory
+        Args:
+            cd_id (int): ID of the CD object to remove.
+        Raises:
+            Exception: If there is no CD with this ID.
+        Returns:
+            None.
+        """
+
+        try:
+            cd = self.__cds.pop(cd_id)
+        except KeyError:
+            raise Exception('CD does not exist')
+        del self.__ids[bisect.bisect_left(self.__ids, cd_id)]
+        self.__free_ids.release(cd_id)
+        cd._owner = None
+        self.__dirty.discard(cd_id)
+        if cd_id in self.__added:
+            self.__added.discard(cd_id)  # never saved, unless its ID is in __removed already
+        else:
+            self.__removed.add(cd_id)
+
+    def _cd_changed(self, cd):
+        """Called by a CD of this inventory after it changed"""
+        self.__dirty.add(cd.cd_id)
+
+    def _cd_rekeyed(self, cd, old_id, new_id):
+        """Called by a CD of this inventory before its ID changes from old_id to new_id"""
+        if new_id in self.__cds:
+            raise Exception('Album with ID {} already exists'.format(new_id))
+        self.remove(old_id)
+        cd._owner = self
+        self.__cds[new_id] = cd
+        self.__free_ids.take(new_id)
+        bisect.insort(self.__ids, new_id)
+        self.__dirty.add(new_id)
+        self.__added.add(new_id)
+
+    def next_free_id(self) -> int:
+        """Returns: (int) the lowest ID from 1 up without a CD"""
+        return self.__free_ids.next_free()
+
+    def get_changes(self):
+        """Returns the changes since the inventory was last saved
+        Returns:
+            (cds, removed) (tuple): cds (list) CD objects added or changed, ordered by ID,
+            removed (list) sorted IDs of CDs removed. A CD can be in both when its ID was reused.
+        """
 
+        return [self.__cds[cd_id] for cd_id in sorted(self.__dirty)], sorted(self.__removed)
 
+    def is_new(self, cd_id: int) -> bool:
+        """Returns: (bool) True if the CD with ID cd_id was added, or given this ID, since the last save"""
+        return cd_id in self.__added
 
+    def mark_clean(self) -> None:
+        """Forgets all changes, after the inventory was saved"""
+        for cd_id in self.__dirty:
+            self.__cds[cd_id].mark_clean()
+        self.__dirty.clear()
+        self.__removed.clear()
+        self.__added.clear()
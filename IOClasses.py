@@ -9,73 +9,1891 @@
 if __name__ == '__main__':
     raise Exception('This file is not meant to run by itself')
 
+import asyncio
+import concurrent.futures
+import contextlib
+import hashlib
+import itertools
+import locale
+import marshal
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+
 import DataClasses as DC
 import ProcessingClasses as PC
 
 
+def _parse_track_chunk(file_name_Track: str, start: int, end: int) -> tuple:
+    """Parses the track rows between the byte offsets start and end (both on line boundaries)
+    Runs in a worker process of FileIO.load_inventory. To keep the result cheap to send back, it holds
+    one batch of three parallel lists per CD instead of an object per row.
+    Args:
+        file_name_Track (string): name of the track inventory file.
+        start (int): offset of the first byte to parse.
+        end (int): offset after the last byte to parse.
+    Returns:
+        dicRows (dict): ([positions], [titles], [lengths]) batches in file order, keyed by CD ID.
+        errors (list): (line number within the chunk, message) of the rows that could not be parsed.
+        lines (int): number of lines in the chunk.
+    """
+
+    with open(file_name_Track, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(locale.getpreferredencoding(False))
+    dicRows = {}
+    errors = []
+    for number, line in enumerate(text.split('\n'), 1):
+        if not line.strip():
+            continue
+        try:
+            data = line.strip().split(',')
+            position, title, length = int(data[1]), data[2], data[3]
+            cd_id = int(data[0])
+        except Exception as e:
+            errors.append((number, str(e)))
+            continue
+        if cd_id not in dicRows:
+            dicRows[cd_id] = ([], [], [])
+        batch = dicRows[cd_id]
+        batch[0].append(position)
+        batch[1].append(title)
+        batch[2].append(length)
+    return dicRows, errors, text.count('\n')
+
+
+def _parse_album(line: str) -> DC.CD:
+    """Returns: (DC.CD) the CD / Album of one row of the album file"""
+    data = line.strip().split(',')
+    return DC.CD(data[0], data[1], data[2])
+
+
+def _parse_track(line: str, dicTracks: dict) -> None:
+    """Adds the Track of one row of the track file to dicTracks, lists of Track objects keyed by CD ID"""
+    data = line.strip().split(',')
+    row = DC.Track(int(data[1]), data[2], data[3])
+    cd_id = int(data[0])
+    if cd_id in dicTracks:
+        dicTracks[cd_id].append(row)
+    else:
+        dicTracks[cd_id] = [row]
+
+
+def _row_error(errors: list, file_name: str, number, message: str) -> None:
+    """Prints a row of an inventory file that could not be loaded and records it in errors
+    Args:
+        errors (list): (file name, line number, message) tuples to add to.
+        file_name (string): name of the file.
+        number (int): line number of the row, None if the error is not about a single row.
+        message (string): what went wrong.
+    Returns:
+        None.
+    """
+
+    if number is None:
+        print('There was a general error in {}! {}'.format(file_name, message))
+    else:
+        print('There was a general error in line {} of {}! {}'.format(number, file_name, message))
+    errors.append((file_name, number, message))
+
+
+def _file_error(errors: list, file_name: str, e: Exception) -> None:
+    """Prints an inventory file that could not be read at all and records it in errors"""
+    if type(e) == FileNotFoundError:
+        print('Found no file to load. Add Album and/or tracks and save to create file')
+    else:
+        print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+    errors.append((getattr(e, 'filename', None) or file_name, None, str(e)))
+
+
+def _attach_tracks(lst_Inventory: DC.Inventory, dicTracks: dict, file_name_Track: str, errors: list) -> None:
+    """Adds the lists of tracks in dicTracks to their CDs, tracks of a CD that does not exist are reported"""
+    for cd_id, tracks in dicTracks.items():
+        if cd_id in lst_Inventory:
+            lst_Inventory.get_cd(cd_id).add_tracks(tracks)
+        else:
+            _row_error(errors, file_name_Track, None,
+                       'CD {} does not exist, its {} track(s) were not loaded'.format(cd_id, len(tracks)))
+
+
+def _parse_track_records(text: str, file_name: str, errors: list = None) -> list:
+    """Returns: (list) Track objects of the track records in text, in order; a row that cannot be
+    parsed is reported as a row of file_name (and recorded in errors, if given) and left out"""
+    if errors is None:
+        errors = []
+    tracks = []
+    for line in text.split('\n'):
+        if line.strip():
+            try:
+                data = line.strip().split(',')
+                tracks.append(DC.Track(int(data[1]), data[2], data[3]))
+            except Exception as e:
+                _row_error(errors, file_name, None, 'Track row {!r} was not loaded: {}'.format(line.strip(), e))
+    return tracks
+
+
 class FileIO:
     """Processes data to and from file:
+    file_name is the list [CD Inventory, Track Inventory] or [CD Inventory, Track Inventory, Journal].
+    The optional journal holds the changes appended by save_changes since the last full save.
     methods:
         save_inventory(file_name, lst_Inventory): -> None
-        load_inventory(file_name): -> (a list of CD objects)
+        save_changes(file_name, lst_Inventory): -> None
+        compact_inventory(file_name, lst_Inventory): -> None
+        recover(file_name): Completes a save_inventory that was cut short after its commit point -> None
+        load_inventory(file_name, timings, workers, lazy, errors): -> (an Inventory of CD objects)
+        replay_journal(file_name_Journal, lst_Inventory, errors): -> None
+        journal_lines(lst_Inventory, tag_new): -> (list) the journal lines of the changes since the last save
+        apply_journal(lines, lst_Inventory): -> (list) line numbers and messages of the lines that failed
+        iter_inventory(file_name, grouped): -> (generator of CD objects with their tracks)
     """
 
+    CHUNK_RECORDS = 10000  # CD / Albums joined into one buffer per write
+    WORKERS = 1  # processes parsing the track file, 1 parses it in this process
+    MIN_CHUNK_BYTES = 1 << 20  # smallest part of the track file worth handing to a worker
+
     ###    Methods    ###
     @staticmethod
-    def save_inventory(file_name: list, lst_Inventory: list) -> None:
+    def __album_chunks(lst_Inventory):
+        """Generator of album file contents in the order of the CD IDs, CHUNK_RECORDS albums per string"""
+        buffer = []
+        for disc in lst_Inventory.ordered():
+            buffer.append(disc.get_record())
+            if len(buffer) >= FileIO.CHUNK_RECORDS:
+                yield ''.join(buffer)
+                buffer = []
+        yield ''.join(buffer)
+
+    @staticmethod
+    def __track_chunks(lst_Inventory):
+        """Generator of track file contents in the order of the CD IDs, the tracks of CHUNK_RECORDS albums per string"""
+        buffer = []
+        count = 0
+        for disc in lst_Inventory.ordered():
+            buffer.append(disc.get_track_records())
+            count += 1
+            if count >= FileIO.CHUNK_RECORDS:
+                yield ''.join(buffer)
+                buffer = []
+                count = 0
+        yield ''.join(buffer)
+
+    @staticmethod
+    def __write_temp(file_name, chunks):
+        """Writes chunks to a temporary file next to file_name and flushes it to disk
+        Returns:
+            tmp_name (string): name of the temporary file.
+        """
+
+        tmp_name = file_name + '.tmp'
+        with open(tmp_name, 'w') as file:
+            file.writelines(chunks)
+            file.flush()
+            os.fsync(file.fileno())
+        return tmp_name
+
+    @staticmethod
+    def __sync_dir(file_name):
+        """Flushes the directory entry of file_name to disk, where the OS supports it"""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(file_name)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def __commit_name(file_name):
+        """Returns: (string) name of the commit file of a save_inventory of file_name"""
+        return file_name[0] + '.commit'
+
+    @staticmethod
+    def recover(file_name: list) -> None:
+        """Completes a save_inventory that stopped, by a crash or an error, after its commit point:
+        the temporary files it names in the commit file replace the ones they were written for.
+        Does nothing without a commit file. Called before the files are read or appended to.
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory(, Journal)] that hold the data.
+        Returns:
+            None.
         """
+
+        commit_name = FileIO.__commit_name(file_name)
+        try:
+            with open(commit_name, 'r') as file:
+                names = file.read().splitlines()
+        except FileNotFoundError:
+            return
+        for name in names:
+            if os.path.exists(name + '.tmp'):  # not replaced yet
+                os.replace(name + '.tmp', name)
+        FileIO.__sync_dir(commit_name)
+        os.remove(commit_name)
+
+    @staticmethod
+    def save_inventory(file_name: list, lst_Inventory: DC.Inventory) -> None:
+        """Rewrites the inventory files in full and empties the journal
+        The album and track files are written concurrently into temporary files in large chunks, with
+        the CD / Albums and their tracks in the order of their IDs whatever order they were added in.
+        Once they and the empty journal are complete and flushed to disk, a commit file naming them
+        is written and flushed as well: the commit point. Only then do they replace the originals.
+        A crash before the commit point leaves the previous inventory; a crash after it leaves the
+        commit file, and recover, run by the next load or save, completes the replacement. So the
+        album file, track file and journal are always read as a set from the same save.
         Args:
-            file_name (list): list of file names [CD Inventory, Track Inventory] that hold the data.
-            lst_Inventory (list): list of CD objects.
+            file_name (list): list of file names [CD Inventory, Track Inventory(, Journal)] that hold the data.
+            lst_Inventory (DC.Inventory): Inventory of CD objects, marked clean once it is saved. A plain
+                list of CDs is not enough: the files are written in its ID order.
         Returns:
             None.
         """
 
         file_name_CD = file_name[0]
         file_name_Track = file_name[1]
+        commit_name = FileIO.__commit_name(file_name)
         try:
-            with open(file_name_CD, 'w') as file:
-                for disc in lst_Inventory:
-                    file.write(disc.get_record())
-            with open(file_name_Track, 'w') as file:
-                for disc in lst_Inventory:
-                    for track in disc.cd_tracks:
-                        if track is not None:
-                            file.write('{},{}'.format(disc.cd_id, track.get_record()))
+            FileIO.recover(file_name)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+                futures = [pool.submit(FileIO.__write_temp, file_name_CD, FileIO.__album_chunks(lst_Inventory)),
+                           pool.submit(FileIO.__write_temp, file_name_Track, FileIO.__track_chunks(lst_Inventory))]
+                if len(file_name) > 2:
+                    futures.append(pool.submit(FileIO.__write_temp, file_name[2], []))
+                for future in futures:
+                    future.result()
+            os.replace(FileIO.__write_temp(commit_name, [name + '\n' for name in file_name]), commit_name)
+            FileIO.__sync_dir(commit_name)
         except Exception as e:
             print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+            for name in file_name + [commit_name]:
+                if os.path.exists(name + '.tmp'):
+                    os.remove(name + '.tmp')
+            return
+        lst_Inventory.mark_clean()  # saved: from here on recover completes it
+        try:
+            FileIO.recover(file_name)
+        except Exception as e:
+            print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+            print('The save is completed the next time the inventory is loaded.')
 
     @staticmethod
-    def load_inventory(file_name: list) -> list:
+    def save_changes(file_name: list, lst_Inventory: DC.Inventory) -> None:
+        """Appends the changes since the last save to the journal instead of rewriting the inventory
+        The journal has one line per change:
+            A,cd_id,title,artist          CD / Album added or ID, title or artist changed
+            N,cd_id,title,artist          CD / Album added, only sent to an InventoryServer (see journal_lines)
+            E,cd_id,title,artist          title or artist of an existing CD / Album changed, only sent to an
+                                          InventoryServer
+            X,cd_id                       CD / Album removed with all its tracks
+            T,cd_id,position,title,length track added or changed
+            D,cd_id,position              track removed
+        Falls back to save_inventory when file_name names no journal.
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory, Journal] that hold the data.
+            lst_Inventory (DC.Inventory): Inventory of CD objects.
+        Returns:
+            None.
         """
+
+        if len(file_name) < 3:
+            FileIO.save_inventory(file_name, lst_Inventory)
+            return
+        lines = FileIO.journal_lines(lst_Inventory)
+        try:
+            FileIO.recover(file_name)  # a journal about to be replaced must not get the changes
+            with open(file_name[2], 'a') as file:
+                file.write(''.join(lines))
+            lst_Inventory.mark_clean()
+        except Exception as e:
+            print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+
+    @staticmethod
+    def journal_lines(lst_Inventory: DC.Inventory, tag_new: bool = False) -> list:
+        """Returns the journal lines (see save_changes) of the changes since the last save
         Args:
-            file_name (list): list of file names [CD Inventory, Track Inventory] that hold the data.
+            lst_Inventory (DC.Inventory): Inventory of CD objects.
+            tag_new (bool): True to write a CD / Album added since the last save as an N line, which
+                apply_journal rejects if the ID is taken, and a changed one as an E line, which it rejects
+                if the CD no longer exists, instead of an A line, which it applies either way.
         Returns:
-            list_Inventory (list): list of CD objects.
+            lines (list): the journal lines.
+        """
+
+        cds, removed = lst_Inventory.get_changes()
+        lines = ['X,{}\n'.format(cd_id) for cd_id in removed]
+        for disc in cds:
+            header, positions = disc.get_changes()
+            if header:
+                tag = 'A,'
+                if tag_new:
+                    tag = 'N,' if lst_Inventory.is_new(disc.cd_id) else 'E,'
+                lines.append(tag + disc.get_record())
+            tracks = {track.position: track for track in disc.cd_tracks} if positions else {}
+            for position in positions:
+                if position in tracks:
+                    lines.append('T,{},{}'.format(disc.cd_id, tracks[position].get_record()))
+                else:
+                    lines.append('D,{},{}\n'.format(disc.cd_id, position))
+        return lines
+
+    @staticmethod
+    def compact_inventory(file_name: list, lst_Inventory: DC.Inventory = None) -> None:
+        """Folds the journal back into the inventory files
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory, Journal] that hold the data.
+            lst_Inventory (DC.Inventory, optional): the inventory as loaded and saved, loaded from file if not given.
+        Returns:
+            None.
+        """
+
+        if lst_Inventory is None:
+            lst_Inventory = FileIO.load_inventory(file_name)
+        FileIO.save_inventory(file_name, lst_Inventory)
+
+    @staticmethod
+    def __chunk_bounds(file_name_Track, workers):
+        """Splits the track file into at most workers byte ranges that start and end on line boundaries
+        Returns:
+            bounds (list): (start, end) tuples of byte offsets, in file order.
+        """
+
+        size = os.path.getsize(file_name_Track)
+        n = max(1, min(workers, size // FileIO.MIN_CHUNK_BYTES))
+        bounds = []
+        start = 0
+        with open(file_name_Track, 'rb') as file:
+            for i in range(1, n + 1):
+                end = size
+                if i < n:
+                    file.seek(max(start, size * i // n))
+                    file.readline()
+                    end = file.tell()
+                if end > start:
+                    bounds.append((start, end))
+                start = end
+        return bounds
+
+    @staticmethod
+    def __parse_tracks_parallel(file_name_Track, workers, errors):
+        """Parses the track file in byte range chunks on a pool of worker processes
+        Returns:
+            dicTracks (dict): lists of Track objects in file order, keyed by CD ID.
+        """
+
+        bounds = FileIO.__chunk_bounds(file_name_Track, workers)
+        dicTracks = {}
+        lines = 0  # lines in the chunks before, to number the rows that failed
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(bounds)) as pool:
+            futures = [pool.submit(_parse_track_chunk, file_name_Track, start, end) for start, end in bounds]
+            for future in futures:  # merged in file order, so a repeated position keeps the last row
+                dicRows, chunk_errors, chunk_lines = future.result()
+                for number, message in chunk_errors:
+                    _row_error(errors, file_name_Track, lines + number, message)
+                lines += chunk_lines
+                for cd_id, (positions, titles, lengths) in dicRows.items():
+                    tracks = list(map(DC.Track, positions, titles, lengths))
+                    if cd_id in dicTracks:
+                        dicTracks[cd_id].extend(tracks)
+                    else:
+                        dicTracks[cd_id] = tracks
+        return dicTracks
+
+    @staticmethod
+    def load_inventory(file_name: list, timings: dict = None, workers: int = None, lazy: bool = False,
+                       errors: list = None) -> DC.Inventory:
+        """Loads the inventory in bulk: track rows are grouped by CD ID in one pass
+        and each album gets all of its tracks attached with a single sort.
+        Each row is loaded on its own: blank lines are skipped, a row that cannot be parsed or repeats
+        an album ID is reported and left out, and the tracks read up to a file error are still attached.
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory(, Journal)] that hold the data.
+            timings (dict, optional): if given, filled with the seconds spent in each phase
+                ('albums', 'tracks', 'attach', 'journal').
+            workers (int, optional): processes that parse the track file, defaults to FileIO.WORKERS.
+                With more than one, the file is split into byte ranges parsed in parallel; the
+                result is the same as with one.
+            lazy (bool): True to only index where each CD's rows are in the track file; the tracks of a
+                CD are then read the first time they are used. workers is ignored.
+            errors (list, optional): if given, filled with (file name, line number, message) of every
+                row, file or journal line that could not be loaded, line number None if the error is
+                not about a single row. Empty if the inventory is complete.
+        Returns:
+            lst_Inventory (DC.Inventory): Inventory of CD objects.
         """
 
         file_name_CD = file_name[0]
         file_name_Track = file_name[1]
-        lst_Inventory = []
+        lst_Inventory = DC.Inventory()
+        lstErrors = errors if errors is not None else []
+        if timings is None:
+            timings = {}
+        dicTracks = {}
         try:
+            FileIO.recover(file_name)
+            start = time.perf_counter()
             with open(file_name_CD, 'r') as file:
-                for line in file:
-                    data = line.strip().split(',')
-                    row = DC.CD(data[0], data[1], data[2])
-                    lst_Inventory.append(row)
-            with open(file_name_Track, 'r') as file:
-                for line in file:
+                for number, line in enumerate(file, 1):
+                    if line.strip():
+                        try:
+                            lst_Inventory.append(_parse_album(line))
+                        except Exception as e:
+                            _row_error(lstErrors, file_name_CD, number, str(e))
+            timings['albums'] = time.perf_counter() - start
+            start = time.perf_counter()
+            if workers is None:
+                workers = FileIO.WORKERS
+            if lazy:
+                objTrackIndex = TrackFileIndex(file_name_Track, lstErrors)
+                for cd in lst_Inventory:
+                    if cd.cd_id in objTrackIndex:
+                        cd.set_track_source(objTrackIndex)
+                for cd_id in objTrackIndex:
+                    if cd_id not in lst_Inventory:
+                        _row_error(lstErrors, file_name_Track, None,
+                                   'CD {} does not exist, its tracks were not loaded'.format(cd_id))
+            elif workers > 1:
+                dicTracks = FileIO.__parse_tracks_parallel(file_name_Track, workers, lstErrors)
+            else:
+                with open(file_name_Track, 'r') as file:
+                    for number, line in enumerate(file, 1):
+                        if line.strip():
+                            try:
+                                _parse_track(line, dicTracks)
+                            except Exception as e:
+                                _row_error(lstErrors, file_name_Track, number, str(e))
+            timings['tracks'] = time.perf_counter() - start
+        except Exception as e:
+            _file_error(lstErrors, file_name_CD, e)
+        start = time.perf_counter()
+        _attach_tracks(lst_Inventory, dicTracks, file_name_Track, lstErrors)
+        timings['attach'] = time.perf_counter() - start
+        if len(file_name) > 2:
+            start = time.perf_counter()
+            FileIO.replay_journal(file_name[2], lst_Inventory, lstErrors)
+            timings['journal'] = time.perf_counter() - start
+        lst_Inventory.mark_clean()
+        return lst_Inventory
+
+    @staticmethod
+    def replay_journal(file_name_Journal: str, lst_Inventory: DC.Inventory, errors: list = None) -> None:
+        """Applies the changes recorded in the journal (see save_changes) to the inventory
+        Args:
+            file_name_Journal (string): name of the journal file, a missing file means no changes.
+            lst_Inventory (DC.Inventory): Inventory of CD objects loaded from the inventory files.
+            errors (list, optional): if given, filled with (file name, line number, message) of every
+                line that could not be applied, as in load_inventory.
+        Returns:
+            None.
+        """
+
+        lstErrors = errors if errors is not None else []
+        try:
+            with open(file_name_Journal, 'r') as file:
+                lines = FileIO.apply_journal(file, lst_Inventory)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            _file_error(lstErrors, file_name_Journal, e)
+            return
+        for number, message in lines:
+            _row_error(lstErrors, file_name_Journal, number, message)
+
+    @staticmethod
+    def apply_journal(lines, lst_Inventory: DC.Inventory) -> list:
+        """Applies journal lines (see save_changes) to the inventory, each one on its own
+        Args:
+            lines (iterable of strings): the journal lines.
+            lst_Inventory (DC.Inventory): Inventory of CD objects.
+        Returns:
+            errors (list): (line number, message) of every line that could not be applied, e.g. a track of
+            a CD that does not exist; the other lines are applied all the same. Blank lines are skipped.
+            The lines after an N line that failed, because another CD has the ID, are not applied to that CD.
+            An E line fails if the CD does not exist, e.g. because someone else removed it.
+        """
+
+        errors = []
+        rejected = set()  # IDs of the CDs of N lines that failed
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                data = line.strip().split(',')
+                cd_id = int(data[1])
+                if cd_id in rejected:
+                    raise Exception('Album with ID {} was not added'.format(cd_id))
+                if data[0] == 'N':
+                    if cd_id in lst_Inventory:
+                        rejected.add(cd_id)
+                        raise Exception('Album with ID {} already exists'.format(cd_id))
+                    lst_Inventory.append(DC.CD(cd_id, data[2], data[3]))
+                elif data[0] == 'E':
+                    if cd_id not in lst_Inventory:
+                        raise Exception('Album with ID {} does not exist'.format(cd_id))
+                    cd = lst_Inventory.get_cd(cd_id)
+                    cd.cd_title = data[2]
+                    cd.cd_artist = data[3]
+                elif data[0] == 'A':
+                    if cd_id in lst_Inventory:
+                        cd = lst_Inventory.get_cd(cd_id)
+                        cd.cd_title = data[2]
+                        cd.cd_artist = data[3]
+                    else:
+                        lst_Inventory.append(DC.CD(cd_id, data[2], data[3]))
+                elif data[0] == 'X':
+                    if cd_id in lst_Inventory:
+                        lst_Inventory.remove(cd_id)
+                elif data[0] == 'T':
+                    cd = PC.DataProcessor.select_cd(lst_Inventory, cd_id)
+                    cd.add_track(DC.Track(int(data[2]), data[3], data[4]))
+                elif data[0] == 'D':
+                    cd = PC.DataProcessor.select_cd(lst_Inventory, cd_id)
+                    if cd.has_track(int(data[2])):
+                        cd.rmv_track(int(data[2]))
+            except Exception as e:
+                errors.append((number, str(e)))
+        return errors
+
+    @staticmethod
+    def iter_inventory(file_name: list, grouped: bool = True):
+        """Reads the inventory one album at a time, without building the full inventory
+        With grouped=True the track file is read in lockstep with the album file. This needs the
+        track rows of each CD in one block, in the same order as the albums, which is how
+        save_inventory writes them. Memory then stays bounded by the size of one album.
+        If the track file is not grouped that way an Exception is raised once the album file is
+        exhausted and track rows are left over; albums yielded before that may miss tracks.
+        With grouped=False all track rows are read into a dict by CD ID first, so any order works,
+        but memory grows with the number of tracks.
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory] that hold the data.
+            grouped (bool): True if the track file is grouped by CD ID in album order.
+        Raises:
+            Exception: If grouped is True and the track file is not grouped in album order.
+        Returns:
+            cd (DC.CD): generator of CD objects with their tracks attached.
+        """
+
+        file_name_CD = file_name[0]
+        file_name_Track = file_name[1]
+        FileIO.recover(file_name)
+        try:
+            file_CD = open(file_name_CD, 'r')
+            file_Track = open(file_name_Track, 'r')
+        except FileNotFoundError:
+            print('Found no file to load. Add Album and/or tracks and save to create file')
+            return
+        with file_CD, file_Track:
+            dicTracks = {}
+            if not grouped:
+                for line in file_Track:
+                    if not line.strip():
+                        continue
                     data = line.strip().split(',')
-                    row = DC.Track(int(data[1]), data[2], data[3])
-                    cd = PC.DataProcessor.select_cd(lst_Inventory, int(data[0]))
-                    cd.add_track(row)
+                    dicTracks.setdefault(int(data[0]), []).append(DC.Track(int(data[1]), data[2], data[3]))
+            pending = None
+            for line in file_CD:
+                if not line.strip():
+                    continue
+                cd = _parse_album(line)
+                if not grouped:
+                    cd.add_tracks(dicTracks.pop(cd.cd_id, []))
+                    yield cd
+                    continue
+                tracks = []
+                while True:
+                    if pending is None:
+                        track_line = file_Track.readline()
+                        if not track_line:
+                            break
+                        if not track_line.strip():
+                            continue
+                        data = track_line.strip().split(',')
+                        pending = (int(data[0]), DC.Track(int(data[1]), data[2], data[3]))
+                    if pending[0] != cd.cd_id:
+                        break
+                    tracks.append(pending[1])
+                    pending = None
+                cd.add_tracks(tracks)
+                yield cd
+            if pending is not None:
+                raise Exception('Track file is not grouped by CD ID in album order, use grouped=False')
+            if dicTracks:
+                raise Exception('CD does not exist')
+
+
+class AsyncFileIO:
+    """asyncio variant of FileIO for loads and saves that must not block:
+    load_inventory reads the album and track files at the same time, chunk by chunk on the default
+    executor, and parses the complete lines of each chunk while the next one is read.
+    The _sync methods run them to completion and have the same arguments and results as FileIO.
+    methods:
+        load_inventory(file_name, errors): -> (coroutine of an Inventory of CD objects)
+        save_inventory(file_name, lst_Inventory): -> (coroutine of None)
+        load_inventory_sync(file_name): -> (an Inventory of CD objects)
+        save_inventory_sync(file_name, lst_Inventory): -> None
+    """
+
+    CHUNK_CHARS = 1 << 20  # characters read per chunk
+
+    ###    Methods    ###
+    @staticmethod
+    async def __read_lines(file_name, parse_line, errors):
+        """Reads file_name in chunks and calls parse_line on every complete, non-blank line as it arrives,
+        a line it raises an Exception for is reported and recorded in errors"""
+        loop = asyncio.get_running_loop()
+        number = 0
+
+        def parse(line):
+            if line.strip():
+                try:
+                    parse_line(line)
+                except Exception as e:
+                    _row_error(errors, file_name, number, str(e))
+
+        with open(file_name, 'r') as file:
+            rest = ''
+            while True:
+                chunk = await loop.run_in_executor(None, file.read, AsyncFileIO.CHUNK_CHARS)
+                if not chunk:
+                    break
+                lines = (rest + chunk).split('\n')
+                rest = lines.pop()
+                for line in lines:
+                    number += 1
+                    parse(line)
+            number += 1
+            parse(rest)
+
+    @staticmethod
+    async def load_inventory(file_name: list, errors: list = None) -> DC.Inventory:
+        """Loads the inventory, reading both files concurrently
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory(, Journal)] that hold the data.
+            errors (list, optional): filled as by FileIO.load_inventory.
+        Returns:
+            lst_Inventory (DC.Inventory): Inventory of CD objects, the same FileIO.load_inventory returns;
+            rows that cannot be loaded are reported and left out in the same way.
+        """
+
+        lst_Inventory = DC.Inventory()
+        lstErrors = errors if errors is not None else []
+        dicTracks = {}
+        try:
+            FileIO.recover(file_name)
         except Exception as e:
-            if type(e) == FileNotFoundError:
-                print('Found no file to load. Add Album and/or tracks and save to create file')
-            else:
-                print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+            _file_error(lstErrors, file_name[0], e)
+        outcomes = await asyncio.gather(
+            AsyncFileIO.__read_lines(file_name[0], lambda line: lst_Inventory.append(_parse_album(line)), lstErrors),
+            AsyncFileIO.__read_lines(file_name[1], lambda line: _parse_track(line, dicTracks), lstErrors),
+            return_exceptions=True)  # a missing file must not leave the other one still being read
+        for name, outcome in zip(file_name, outcomes):
+            if isinstance(outcome, Exception):
+                _file_error(lstErrors, name, outcome)
+                break
+        if isinstance(outcomes[0], Exception):
+            dicTracks.clear()  # without albums FileIO.load_inventory reads no tracks either
+        _attach_tracks(lst_Inventory, dicTracks, file_name[1], lstErrors)
+        if len(file_name) > 2:
+            FileIO.replay_journal(file_name[2], lst_Inventory, lstErrors)
+        lst_Inventory.mark_clean()
         return lst_Inventory
 
+    @staticmethod
+    async def save_inventory(file_name: list, lst_Inventory: DC.Inventory) -> None:
+        """Runs FileIO.save_inventory on the default executor
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory(, Journal)] that hold the data.
+            lst_Inventory (DC.Inventory): Inventory of CD objects, not to be changed until the save is done.
+        Returns:
+            None.
+        """
+
+        await asyncio.get_running_loop().run_in_executor(None, FileIO.save_inventory, file_name, lst_Inventory)
+
+    @staticmethod
+    def load_inventory_sync(file_name: list) -> DC.Inventory:
+        """Returns: (DC.Inventory) load_inventory run to completion"""
+        return asyncio.run(AsyncFileIO.load_inventory(file_name))
+
+    @staticmethod
+    def save_inventory_sync(file_name: list, lst_Inventory: DC.Inventory) -> None:
+        """Runs save_inventory to completion"""
+        asyncio.run(AsyncFileIO.save_inventory(file_name, lst_Inventory))
+
+
+class BackgroundReload:
+    """Runs an async load on its own thread and event loop, so the menu can go on meanwhile:
+    The caller checks done() between operations and then takes result() in one assignment,
+    which swaps the whole inventory at once.
+    methods:
+        done() -> (bool) True when the load finished or failed
+        result() -> (DC.Inventory) the loaded inventory
+    """
+
+    ###    Constructor    ###
+    def __init__(self, load) -> None:
+        """Starts load(), a coroutine function returning the inventory, on a background thread"""
+        ###    Attributes    ###
+        self.__result = None
+        self.__error = None
+        self.__thread = threading.Thread(target=self.__run, args=(load,), daemon=True)
+        self.__thread.start()
+
+    ###    Methods    ###
+    def __run(self, load):
+        try:
+            self.__result = asyncio.run(load())
+        except Exception as e:
+            self.__error = e
+
+    def done(self) -> bool:
+        return not self.__thread.is_alive()
+
+    def result(self) -> DC.Inventory:
+        """Waits for the load to finish
+        Raises:
+            Exception: The exception the load raised.
+        Returns:
+            table (DC.Inventory): the loaded inventory.
+        """
+
+        self.__thread.join()
+        if self.__error is not None:
+            raise Exception('Reload failed: {}'.format(self.__error))
+        return self.__result
+
+
+class TrackFileIndex:
+    """Index of where the rows of each CD / Album are in the track inventory file:
+    Built by scanning the file once for the CD ID at the start of every row, without parsing the rows.
+    The tracks of a CD are parsed only when load_tracks is called for it.
+    methods:
+        __contains__(cd_id) -> (bool) True if the file holds tracks of the CD with ID cd_id
+        __iter__() -> the IDs of the CDs the file holds tracks of
+        load_tracks(cd_id) -> (list) Track objects of the CD with ID cd_id
+        load_records(cd_id) -> (string) the rows of the CD with ID cd_id as they are in the file
+        reading(): -> (context manager) keeping the file open for the load_records calls inside it
+        restamp(size, mtime_ns): Accepts the track file as changed by someone else -> None
+    """
+
+    ###    Constructor    ###
+    def __init__(self, file_name_Track: str, errors: list = None) -> None:
+        """Scans file_name_Track and records the byte ranges of the rows of every CD,
+        rows without a CD ID are reported and recorded in errors, if given"""
+        if errors is None:
+            errors = []
+        ###    Attributes    ###
+        self.__file_name = file_name_Track
+        self.__file = None  # kept open by reading()
+        self.__lock = threading.Lock()  # for the file kept open, the background reload reads too
+        self.__spans = {}  # cd_id -> (start, end, start, end, ...) byte ranges of its rows
+        with open(file_name_Track, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            self.__stamp = (stat.st_size, stat.st_mtime_ns)
+            offset = 0
+            last_id = None
+            spans = None
+            for number, line in enumerate(file, 1):
+                end = offset + len(line)
+                comma = line.find(b',')
+                if comma > 0 and line[:comma].isdigit():
+                    cd_id = int(line[:comma])
+                    if cd_id == last_id:
+                        spans[-1] = end
+                    else:
+                        spans = self.__spans.setdefault(cd_id, [])
+                        spans += [offset, end]
+                        last_id = cd_id
+                elif line.strip():
+                    _row_error(errors, file_name_Track, number, 'Row without a CD ID')
+                offset = end
+        for cd_id, spans in self.__spans.items():
+            self.__spans[cd_id] = tuple(spans)
+
+    ###    Methods    ###
+    def __contains__(self, cd_id) -> bool:
+        return cd_id in self.__spans
+
+    def __iter__(self):
+        return iter(self.__spans)
+
+    def load_tracks(self, cd_id: int) -> list:
+        """Reads and parses the track rows of one CD / Album, rows that cannot be parsed are reported and left out
+        Args:
+            cd_id (int): ID of the CD.
+        Raises:
+            Exception: If the track file changed since it was indexed.
+        Returns:
+            tracks (list): Track objects in file order.
+        """
+
+        return _parse_track_records(self.load_records(cd_id), self.__file_name)
+
+    def load_records(self, cd_id: int) -> str:
+        """Reads the track rows of one CD / Album without parsing them
+        Args:
+            cd_id (int): ID of the CD.
+        Raises:
+            Exception: If the track file changed since it was indexed.
+        Returns:
+            text (string): the rows in file order.
+        """
+
+        spans = self.__spans.get(cd_id, ())
+        with self.__lock:
+            if self.__file is not None:
+                return TrackFileIndex.__read(self.__file, spans)
+        with open(self.__file_name, 'rb') as file:
+            self.__check(file)
+            return TrackFileIndex.__read(file, spans)
+
+    def __check(self, file):
+        """Raises an Exception if the open track file is not the one that was indexed"""
+        stat = os.fstat(file.fileno())
+        if (stat.st_size, stat.st_mtime_ns) != self.__stamp:
+            raise Exception('{} changed since it was loaded, reload the inventory'.format(self.__file_name))
+
+    @staticmethod
+    def __read(file, spans):
+        parts = []
+        for i in range(0, len(spans), 2):
+            file.seek(spans[i])
+            parts.append(file.read(spans[i + 1] - spans[i]))
+        return b''.join(parts).decode(locale.getpreferredencoding(False))
+
+    @contextlib.contextmanager
+    def reading(self):
+        """Opens the track file once for all load_records calls until the block ends
+        Raises:
+            Exception: If the track file changed since it was indexed.
+        """
+
+        with open(self.__file_name, 'rb') as file:
+            self.__check(file)
+            self.__file = file
+            try:
+                yield self
+            finally:
+                with self.__lock:
+                    self.__file = None
+
+    def restamp(self, size: int, mtime_ns: int) -> None:
+        """Accepts the track file with this size and modification time. Only for a caller that checked the
+        rows of every CD still to be loaded from the index are where they were, see IncrementalLoader"""
+        self.__stamp = (size, mtime_ns)
+
+
+class SnapshotCache:
+    """A marshalled copy of the inventory next to the text files, to start without parsing them:
+    The snapshot holds the distinct artists, one (cd_id, title, artist code, track records) tuple
+    per CD, the size, modification time and SHA-1 of every inventory file (and journal) it was
+    taken from and the IncrementalLoader state of the album and track file, so a start from the
+    snapshot does not scan them again. It only holds plain values, so unlike a pickle, reading a
+    snapshot someone else wrote into the inventory directory runs no code. It is only used while
+    the album and track file still match and the journal still starts with the part it had then;
+    the lines appended to the journal since, by saves that do not rewrite the snapshot, are applied
+    on top. Otherwise load returns None and the files are parsed.
+    methods:
+        stamps() -> (list) size, modification time and SHA-1 of every inventory file
+        write(table, stamps, state): Takes a snapshot of table, which must match the files -> None
+        load(lazy, state): -> (DC.Inventory) from the snapshot, or None if it is missing or out of date
+    """
+
+    VERSION = 5
+
+    ###    Constructor    ###
+    def __init__(self, file_name: list, snapshot_name: str) -> None:
+        """Keeps the inventory file names and the name of the snapshot file"""
+        ###    Attributes    ###
+        self.file_name = file_name
+        self.snapshot_name = snapshot_name
+
+    ###    Methods    ###
+    def stamps(self, file_name: list = None) -> list:
+        """Returns: (list) (size, mtime, SHA-1) of every inventory file, or of those in file_name,
+        None for a missing one"""
+        stamps = []
+        for name in file_name if file_name is not None else self.file_name:
+            try:
+                with open(name, 'rb') as file:
+                    stat = os.fstat(file.fileno())
+                    digest = hashlib.sha1()
+                    for block in iter(lambda: file.read(1 << 20), b''):
+                        digest.update(block)
+                stamps.append((stat.st_size, stat.st_mtime_ns, digest.hexdigest()))
+            except FileNotFoundError:
+                stamps.append(None)
+        return stamps
+
+    def write(self, table: DC.Inventory, stamps: list = None, state: list = None) -> None:
+        """Takes a snapshot of table, tracks that were not loaded yet are copied unparsed
+        Args:
+            table (DC.Inventory): Inventory of CD objects, as loaded from or saved to the files.
+            stamps (list, optional): stamps() taken before table was loaded, so a change of the files
+                during the load makes the snapshot out of date. Taken now if not given.
+            state (list, optional): IncrementalLoader.scan() from the same read as stamps, kept for
+                the album and track file.
+        Returns:
+            None.
+        """
+
+        if stamps is None:
+            stamps = self.stamps()
+
+        artists = DC.SymbolTable()
+        with contextlib.ExitStack() as stack:
+            # unloaded tracks are copied through one open file per track file, not one per CD
+            for source in {cd.get_track_source() for cd in table}:
+                if isinstance(source, TrackFileIndex):
+                    stack.enter_context(source.reading())
+            rows = [(cd.cd_id, cd.cd_title, artists.code(cd.cd_artist), cd.peek_track_records())
+                    for cd in table.ordered()]
+        tmp_name = self.snapshot_name + '.tmp'
+        try:
+            with open(tmp_name, 'wb') as file:
+                marshal.dump((SnapshotCache.VERSION, stamps, state[:2] if state else None, artists.strings(), rows),
+                             file)
+            os.replace(tmp_name, self.snapshot_name)
+        except Exception as e:
+            print('The snapshot could not be written:', e)
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def load(self, lazy: bool = False, state: list = None) -> DC.Inventory:
+        """Loads the inventory from the snapshot
+        Args:
+            lazy (bool): True to parse the tracks of a CD only when they are first used.
+            state (list, optional): filled with the IncrementalLoader state of the files the inventory
+                was loaded from, left empty if the snapshot does not hold it.
+        Returns:
+            table (DC.Inventory): Inventory of CD objects, None if the snapshot is missing,
+            unreadable or the files changed since it was taken, other than by appending to the journal.
+        """
+
+        try:
+            with open(self.snapshot_name, 'rb') as file:
+                version, stamps, base_state, artists, rows = marshal.loads(file.read())
+        except Exception:  # also a snapshot of an earlier version, with another layout
+            return None
+        if version != SnapshotCache.VERSION or len(stamps) != len(self.file_name):
+            return None  # also one taken with or without a journal that the file names no longer match
+        if stamps[:2] != self.stamps(self.file_name[:2]):
+            return None
+        lines, first_line, journal_state = [], 1, []
+        if len(self.file_name) > 2:
+            try:
+                with open(self.file_name[2], 'rb') as file:
+                    mtime = os.fstat(file.fileno()).st_mtime_ns
+                    data = file.read()
+                journal_state.append(IncrementalLoader.file_state(data, mtime, False))
+            except FileNotFoundError:
+                data = b''
+                journal_state.append(None)
+            size, digest = (stamps[2][0], stamps[2][2]) if stamps[2] is not None else (0, None)
+            if len(data) < size or (digest is not None and hashlib.sha1(data[:size]).hexdigest() != digest):
+                return None  # the journal was emptied or rewritten
+            lines = data[size:].decode(locale.getpreferredencoding(False)).split('\n')
+            first_line += data.count(b'\n', 0, size)
+        table = DC.Inventory()
+        try:
+            table.extend(DC.CD(cd_id, title, artists[artist]) for cd_id, title, artist, _ in rows)
+        except Exception:  # a damaged snapshot, the files are parsed instead
+            return None
+        source = _SnapshotTracks({cd_id: records for cd_id, _, _, records in rows if records}, self.snapshot_name)
+        for cd in table:
+            if cd.cd_id in source:
+                if lazy:
+                    cd.set_track_source(source)
+                else:
+                    cd.add_tracks(source.load_tracks(cd.cd_id))
+        errors = []
+        for number, message in FileIO.apply_journal(lines, table):
+            _row_error(errors, self.file_name[2], number + first_line - 1, message)
+        table.mark_clean()
+        if state is not None and base_state is not None:
+            state[:] = base_state + journal_state
+        return table
+
+
+class _SnapshotTracks:
+    """Track source of CDs loaded from a SnapshotCache: their track records, parsed on first use"""
+
+    ###    Constructor    ###
+    def __init__(self, records: dict, file_name: str) -> None:
+        ###    Attributes    ###
+        self.__records = records
+        self.__file_name = file_name  # to report rows that cannot be parsed
+
+    ###    Methods    ###
+    def __contains__(self, cd_id) -> bool:
+        return cd_id in self.__records
+
+    def load_records(self, cd_id: int) -> str:
+        return self.__records.get(cd_id, '')
+
+    def load_tracks(self, cd_id: int) -> list:
+        return _parse_track_records(self.__records.pop(cd_id, ''), self.__file_name)
+
+
+class IncrementalLoader:
+    """Brings a loaded inventory up to date by re-parsing only what changed in the files since the load:
+    remember keeps the size and modification time of every file, and a CRC-32 plus the first and last
+    CD ID of each block of about BLOCK_SIZE bytes (ending on a line break). reload compares the files with it:
+        rows appended to the album or track file are parsed; new CDs are added, tracks added or replaced;
+        blocks changed in place (same file size) of an album or track file ordered by ID, as save_inventory
+            writes them, have the CD / Albums or the tracks of every CD in their ID range read again;
+        lines appended to the journal are applied; after a change of the album or track file the whole
+            journal is applied again, which leaves the CDs it already covered as they were.
+    Anything else, such as a shorter file, changed blocks in a file not ordered by ID or rows of a CD
+    that does not exist, needs a full load: reload then returns False and leaves the inventory as it is.
+    methods:
+        scan(stamps): -> (list) the state of the files, to take before loading them
+        file_state(data, mtime, with_ids): -> (tuple) the state of one file read as data
+        remember(table, state): table was loaded from the files as they were in state -> None
+        reload(table): -> (bool) True if table was brought up to date, False if it needs a full load
+    """
+
+    BLOCK_SIZE = 1 << 16
+    ROW_ID = re.compile(rb'\n(\d+),')  # the CD ID of a row, found by the line break before it
+
+    ###    Constructor    ###
+    def __init__(self, file_name: list) -> None:
+        """Keeps the list of file names [CD Inventory, Track Inventory(, Journal)]"""
+        ###    Attributes    ###
+        self.file_name = file_name
+        self.__table = None
+        self.__state = None  # (size, mtime, blocks) per file, None for a missing one
+
+    ###    Methods    ###
+    @staticmethod
+    def __block(data, start, end, with_ids):
+        """Returns: (start, end, CRC, first ID, last ID, ordered) of the block data[start:end]"""
+        crc = zlib.crc32(memoryview(data)[start:end])
+        ids = None
+        if with_ids:
+            found = (IncrementalLoader.ROW_ID.findall(data, start - 1, end) if start
+                     else IncrementalLoader.ROW_ID.findall(b'\n' + data[:end]))
+            ids = [int(cd_id) for cd_id, _ in itertools.groupby(found)]  # one per run of rows of a CD
+        if not ids:
+            return start, end, crc, None, None, True
+        return start, end, crc, ids[0], ids[-1], ids == sorted(ids)
+
+    @staticmethod
+    def __blocks(data, start, with_ids):
+        """Returns: (list) the blocks of data from start on"""
+        blocks = []
+        while start < len(data):
+            end = data.find(b'\n', start + IncrementalLoader.BLOCK_SIZE - 1) + 1 or len(data)
+            blocks.append(IncrementalLoader.__block(data, start, end, with_ids))
+            start = end
+        return blocks
+
+    @staticmethod
+    def __ordered(blocks):
+        """Returns: (bool) True if the rows in blocks are ordered by CD ID"""
+        last = None
+        for _, _, _, first_id, last_id, ordered in blocks:
+            if not ordered or (first_id is not None and last is not None and first_id < last):
+                return False
+            if last_id is not None:
+                last = last_id
+        return True
+
+    @staticmethod
+    def __diff(name, old, with_ids):
+        """Compares a file with its state old
+        Returns:
+            diff: None if the file is as it was, False if its change cannot be merged, otherwise
+            (data, changed, grown, state): its contents, the indexes of the blocks changed in place, the
+            offset of the appended rows (None if it did not grow) and its new state.
+        """
+
+        try:
+            stat = os.stat(name)
+        except FileNotFoundError:
+            return None if old is None else False
+        if old is not None and (stat.st_size, stat.st_mtime_ns) == old[:2]:
+            return None
+        with open(name, 'rb') as file:
+            data = file.read()
+        size, _, blocks = old if old is not None else (0, 0, [])  # a new file was appended to an empty one
+        if len(data) < size:
+            return False
+        blocks = list(blocks)
+        changed = []
+        view = memoryview(data)
+        for i, (start, end, crc) in enumerate(block[:3] for block in blocks):
+            if zlib.crc32(view[start:end]) != crc:
+                if end < len(data) and data[end - 1] != ord('\n'):
+                    return False  # the rows no longer end where the block does
+                blocks[i] = IncrementalLoader.__block(data, start, end, with_ids)
+                changed.append(i)
+        grown = None
+        if len(data) > size:
+            if changed or (size and data[size - 1] != ord('\n')) or data[-1] != ord('\n'):
+                return False  # rows changed as well, or a row is not complete
+            grown = size
+            blocks += IncrementalLoader.__blocks(data, size, with_ids)
+        return data, changed, grown, (len(data), stat.st_mtime_ns, blocks)
+
+    @staticmethod
+    def __lines(data, start, end):
+        """Returns: (list) the non-empty rows of data[start:end], split into fields"""
+        text = data[start:end].decode(locale.getpreferredencoding(False))
+        return [line.strip().split(',') for line in text.split('\n') if line.strip()]
+
+    @staticmethod
+    def __tracks(data, start, end):
+        """Returns: (dict) Track objects of the rows in data[start:end], keyed by CD ID"""
+        dicTracks = {}
+        for row in IncrementalLoader.__lines(data, start, end):
+            dicTracks.setdefault(int(row[0]), []).append(DC.Track(int(row[1]), row[2], row[3]))
+        return dicTracks
+
+    @staticmethod
+    def __id_range(table, lo, hi):
+        """Returns: (list) IDs of the CDs in table from lo to hi"""
+        start = table.index_of(lo)
+        return [cd.cd_id for cd in table.page(start, table.index_of(hi + 1) - start)]
+
+    @staticmethod
+    def file_state(data: bytes, mtime: int, with_ids: bool) -> tuple:
+        """Returns: (tuple) (size, modification time, blocks) of a file read as data,
+        with the CD IDs of the blocks for an album or track file (with_ids)"""
+        return len(data), mtime, IncrementalLoader.__blocks(data, 0, with_ids)
+
+    def scan(self, stamps: list = None) -> list:
+        """Reads the files and returns their state, to be passed to remember
+        Args:
+            stamps (list, optional): filled with SnapshotCache.stamps() from the same read.
+        Returns:
+            state (list): (size, modification time, blocks) of every file, None for a missing one.
+        """
+
+        state = []
+        for number, name in enumerate(self.file_name):
+            try:
+                with open(name, 'rb') as file:
+                    stat = os.fstat(file.fileno())
+                    data = file.read()
+            except FileNotFoundError:
+                state.append(None)
+                if stamps is not None:
+                    stamps.append(None)
+                continue
+            state.append(IncrementalLoader.file_state(data, stat.st_mtime_ns, number < 2))
+            if stamps is not None:
+                stamps.append((len(data), stat.st_mtime_ns, hashlib.sha1(data).hexdigest()))
+        return state
+
+    def remember(self, table: DC.Inventory, state: list) -> None:
+        """Records that table was loaded from the files as they were when scan returned state
+        Taking state before the load is safe: what changes during the load is merged again by reload.
+        """
+
+        self.__table = table
+        self.__state = state
+
+    def reload(self, table: DC.Inventory) -> bool:
+        """Merges the changes of the files since they were loaded into table
+        Args:
+            table (DC.Inventory): the inventory last given to remember.
+        Returns:
+            (bool): True if table is up to date with the files. False if it needs a full load because it
+            has unsaved changes, is not the inventory given to remember, or the files changed in a way
+            that cannot be merged; table is left unchanged then.
+        """
+
+        if table is not self.__table or any(table.get_changes()):
+            return False
+        with_journal = len(self.file_name) > 2
+        diffs = []
+        for number, (name, old) in enumerate(zip(self.file_name, self.__state)):
+            diff = IncrementalLoader.__diff(name, old, number < 2)
+            if diff is False or (number == 2 and diff is not None and diff[1]):
+                return False  # the journal is only ever appended to
+            diffs.append(diff)
+        albums, tracks = diffs[0], diffs[1]
+        journal = diffs[2] if with_journal else None
+
+        # work out every change before applying any, so a file that cannot be merged leaves table as it was
+        upserts = {}  # cd_id -> (title, artist) of CD / Albums to add or update
+        removals = set()
+        replaced = {}  # cd_id -> all of its tracks
+        added = {}  # cd_id -> tracks to add or replace by position
+        lo = hi = None  # ID range of the tracks read again
+        try:
+            if albums is not None:
+                data, changed, grown, state = albums
+                if changed and not (IncrementalLoader.__ordered(self.__state[0][2])
+                                    and IncrementalLoader.__ordered(state[2])):
+                    return False
+                rows = []
+                for i in changed:
+                    block = state[2][i]
+                    rows += IncrementalLoader.__lines(data, block[0], block[1])
+                    ids = [cd_id for candidate in (self.__state[0][2][i], block) for cd_id in candidate[3:5]
+                           if cd_id is not None]
+                    if ids:
+                        removals.update(IncrementalLoader.__id_range(table, min(ids), max(ids)))
+                if grown is not None:
+                    rows += IncrementalLoader.__lines(data, grown, len(data))
+                for row in rows:
+                    cd_id = int(row[0])
+                    if cd_id in upserts or (cd_id in table and cd_id not in removals):
+                        return False  # an ID that is in the file twice
+                    upserts[cd_id] = (row[1], row[2])
+                removals.difference_update(upserts)
+            if tracks is not None:
+                data, changed, grown, state = tracks
+                if changed:
+                    old_blocks, blocks = self.__state[1][2], state[2]
+                    if not (IncrementalLoader.__ordered(old_blocks) and IncrementalLoader.__ordered(blocks)):
+                        return False
+                    first, last = min(changed), max(changed)
+                    ids = [cd_id for i in range(first, last + 1) for candidate in (old_blocks[i], blocks[i])
+                           for cd_id in candidate[3:5] if cd_id is not None]
+                    if ids:
+                        lo, hi = min(ids), max(ids)
+                        # the rows of the CDs at either end may go on in the unchanged blocks next to them
+                        while first > 0 and (blocks[first - 1][4] is None or blocks[first - 1][4] >= lo):
+                            first -= 1
+                        while last + 1 < len(blocks) and (blocks[last + 1][3] is None or blocks[last + 1][3] <= hi):
+                            last += 1
+                        replaced = {cd_id: rows for cd_id, rows in
+                                    IncrementalLoader.__tracks(data, blocks[first][0], blocks[last][1]).items()
+                                    if lo <= cd_id <= hi}
+                        for cd_id in IncrementalLoader.__id_range(table, lo, hi):
+                            if cd_id not in removals:
+                                replaced.setdefault(cd_id, [])
+                        for cd_id in upserts:
+                            if lo <= cd_id <= hi:
+                                replaced.setdefault(cd_id, [])
+                if grown is not None:
+                    added = IncrementalLoader.__tracks(data, grown, len(data))
+                for cd_id in list(replaced) + list(added):
+                    if cd_id not in upserts and (cd_id not in table or cd_id in removals):
+                        return False  # tracks of a CD that does not exist
+            for cd_id in removals:
+                cd = table.get_cd(cd_id)
+                if (lo is None or not lo <= cd_id <= hi) and (cd.get_track_source() is not None or cd.cd_tracks):
+                    return False  # its tracks would be left without a CD
+            lines = []
+            first_line = 1
+            if with_journal and any(diff is not None and (diff[1] or diff[2] is not None) for diff in (albums, tracks)):
+                # the journal changes CDs that were just read again, apply all of it on top
+                if journal is not None:
+                    data = journal[0]
+                else:
+                    try:
+                        with open(self.file_name[2], 'rb') as file:
+                            data = file.read()
+                    except FileNotFoundError:
+                        data = b''
+                lines = data.decode(locale.getpreferredencoding(False)).split('\n')
+            elif journal is not None and journal[2] is not None:
+                data, _, grown, _ = journal
+                first_line += data.count(b'\n', 0, grown)
+                lines = data[grown:].decode(locale.getpreferredencoding(False)).split('\n')
+        except (ValueError, IndexError):
+            return False  # a row that cannot be parsed
+        lines = [line for line in lines if line.strip()]
+
+        if tracks is not None:
+            # unloaded CDs outside the changed blocks still find their rows where the index has them
+            for source in {cd.get_track_source() for cd in table}:
+                if isinstance(source, TrackFileIndex):
+                    source.restamp(tracks[3][0], tracks[3][1])
+        for cd_id in removals:
+            table.remove(cd_id)
+        new_cds = []
+        for cd_id, (title, artist) in upserts.items():
+            if cd_id in table:
+                cd = table.get_cd(cd_id)
+                if (cd.cd_title, cd.cd_artist) != (title, artist):
+                    cd.cd_title = title
+                    cd.cd_artist = artist
+            else:
+                new_cds.append(DC.CD(cd_id, title, artist))
+        table.extend(new_cds)
+        for cd_id, rows in replaced.items():
+            cd = table.get_cd(cd_id)
+            cd.set_track_source(None)  # its rows may have moved
+            cd.cd_tracks = rows
+        for cd_id, rows in added.items():
+            table.get_cd(cd_id).add_tracks(rows)
+        for number, message in FileIO.apply_journal(lines, table):
+            print('There was a general error in line {} of {}! {}'.format(
+                number + first_line - 1, self.file_name[2], message))
+        table.mark_clean()
+        self.__state = [old if diff is None else diff[3] for old, diff in zip(self.__state, diffs)]
+        return True
+
+
+class BinaryIO:
+    """Processes data to and from the binary inventory file:
+    The file starts with a fixed header (magic, version, number of CDs, offset of the index) and the
+    offsets of the two dictionaries, followed by one record per CD, an index of (cd_id, offset) pairs
+    sorted by ID and the dictionaries of the artists and of the track lengths.
+    A dictionary is the number of its strings, the offset of each and the length prefixed UTF-8
+    strings; the records refer to them by their index, their code, so a reader decodes an entry only
+    when a record needs it. A record holds the CD ID, the length prefixed title, the artist code, the
+    number of tracks and for every track its position, length prefixed title and length code. Track
+    titles are mostly distinct, a dictionary would save little and cost an entry each.
+    Files of version 1, with artists and lengths in the records as well, are still read.
+    methods:
+        save_inventory(file_name, table): -> None
+        text_to_binary(file_name, bin_file_name): -> None
+        binary_to_text(bin_file_name, file_name): -> None
+    """
+
+    MAGIC = b'CDIV'
+    VERSION = 2
+    HEADER = struct.Struct('<4sHHQQ')  # magic, version, reserved, CD count, index offset
+    DICTIONARIES = struct.Struct('<QQ')  # offsets of the artist and length dictionaries, after the header
+    OFFSET = struct.Struct('<Q')  # offset of a dictionary entry
+    INDEX_ENTRY = struct.Struct('<qQ')  # cd_id, record offset
+    CD_ID = struct.Struct('<q')
+    COUNT = struct.Struct('<I')  # string length, track count, track position, dictionary size or code
+
+    ###    Methods    ###
+    @staticmethod
+    def __pack_str(value: str) -> bytes:
+        data = value.encode('utf-8')
+        return BinaryIO.COUNT.pack(len(data)) + data
+
+    @staticmethod
+    def save_inventory(file_name: str, table) -> None:
+        """Writes CD objects to a binary inventory file
+        Args:
+            file_name (string): name of the binary inventory file.
+            table (iterable of DC.CD): CD objects to save, in any order.
+        Returns:
+            None.
+        """
+
+        index = []
+        artists, lengths = DC.SymbolTable(), DC.SymbolTable()
+        with open(file_name, 'wb') as file:
+            file.write(BinaryIO.HEADER.pack(BinaryIO.MAGIC, BinaryIO.VERSION, 0, 0, 0))
+            file.write(BinaryIO.DICTIONARIES.pack(0, 0))
+            offset = BinaryIO.HEADER.size + BinaryIO.DICTIONARIES.size
+            for disc in table:
+                tracks = disc.cd_tracks
+                parts = [BinaryIO.CD_ID.pack(disc.cd_id), BinaryIO.__pack_str(disc.cd_title),
+                         BinaryIO.COUNT.pack(artists.code(disc.cd_artist)), BinaryIO.COUNT.pack(len(tracks))]
+                for track in tracks:
+                    parts.append(BinaryIO.COUNT.pack(track.position))
+                    parts.append(BinaryIO.__pack_str(track.title))
+                    parts.append(BinaryIO.COUNT.pack(lengths.code(track.length)))
+                record = b''.join(parts)
+                index.append((disc.cd_id, offset))
+                file.write(record)
+                offset += len(record)
+            index.sort()
+            file.write(b''.join(BinaryIO.INDEX_ENTRY.pack(cd_id, pos) for cd_id, pos in index))
+            dictionaries = []
+            end = offset + len(index) * BinaryIO.INDEX_ENTRY.size
+            for dictionary in (artists, lengths):
+                dictionaries.append(end)
+                strings = [BinaryIO.__pack_str(value) for value in dictionary.strings()]
+                start = end + BinaryIO.COUNT.size + len(strings) * BinaryIO.OFFSET.size
+                offsets = list(itertools.accumulate((len(data) for data in strings[:-1]), initial=start))
+                file.write(BinaryIO.COUNT.pack(len(strings)))
+                file.write(b''.join(BinaryIO.OFFSET.pack(entry) for entry in offsets[:len(strings)]))
+                file.write(b''.join(strings))
+                end = start + sum(len(data) for data in strings)
+            file.seek(0)
+            file.write(BinaryIO.HEADER.pack(BinaryIO.MAGIC, BinaryIO.VERSION, 0, len(index), offset))
+            file.write(BinaryIO.DICTIONARIES.pack(*dictionaries))
+
+    @staticmethod
+    def text_to_binary(file_name: list, bin_file_name: str) -> None:
+        """Converts the text inventory files into a binary inventory file, as FileIO.load_inventory loads them
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory(, Journal)] to read.
+            bin_file_name (string): name of the binary inventory file to write.
+        Returns:
+            None.
+        """
+
+        BinaryIO.save_inventory(bin_file_name, FileIO.load_inventory(file_name))
+
+    @staticmethod
+    def binary_to_text(bin_file_name: str, file_name: list) -> None:
+        """Converts a binary inventory file into the text inventory files
+        Args:
+            bin_file_name (string): name of the binary inventory file to read.
+            file_name (list): list of file names [CD Inventory, Track Inventory] to write.
+        Returns:
+            None.
+        """
+
+        with BinaryInventory(bin_file_name) as inventory, \
+                open(file_name[0], 'w') as file_CD, open(file_name[1], 'w') as file_Track:
+            for disc in inventory:
+                file_CD.write(disc.get_record())
+                for track in disc.cd_tracks:
+                    file_Track.write('{},{}'.format(disc.cd_id, track.get_record()))
+
+
+class BinaryInventory:
+    """Read only access to a binary inventory file through mmap:
+    Lookups binary search the index and decode only the record they need.
+    properties:
+        None.
+    methods:
+        __len__() -> (int) number of CD / Albums in the file
+        __iter__() -> iterator over the CD objects (with tracks) ordered by ID
+        __contains__(cd_id) -> (bool) True if a CD with ID cd_id is in the file
+        get_cd(cd_id) -> (DC.CD) CD object with ID cd_id and its tracks
+        get_tracks(cd_id) -> (list) Track objects of the CD with ID cd_id
+        close(): Closes the file -> None
+    """
+
+    ###    Constructor    ###
+    def __init__(self, bin_file_name: str) -> None:
+        """Opens and maps the binary inventory file bin_file_name"""
+        ###    Attributes    ###
+        self.__file = open(bin_file_name, 'rb')
+        try:
+            self.__mm = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, _, self.__count, self.__index = BinaryIO.HEADER.unpack_from(self.__mm, 0)
+        except Exception:
+            self.__file.close()
+            raise Exception('{} is not a binary inventory file'.format(bin_file_name))
+        if magic != BinaryIO.MAGIC or not 1 <= version <= BinaryIO.VERSION:
+            self.close()
+            raise Exception('{} is not a binary inventory file'.format(bin_file_name))
+        self.__version = version
+        self.__artists = self.__lengths = None  # (offset, decoded entries) of the dictionaries of version 2
+        if version >= 2:
+            artists, lengths = BinaryIO.DICTIONARIES.unpack_from(self.__mm, BinaryIO.HEADER.size)
+            self.__artists = (artists, {})
+            self.__lengths = (lengths, {})
+
+    ###    Methods    ###
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self):
+        for i in range(self.__count):
+            _, offset = BinaryIO.INDEX_ENTRY.unpack_from(self.__mm, self.__index + i * BinaryIO.INDEX_ENTRY.size)
+            yield self.__read_cd(offset, True)
+
+    def __contains__(self, cd_id) -> bool:
+        return self.__find(cd_id) is not None
+
+    def close(self) -> None:
+        """Unmaps and closes the file"""
+        self.__mm.close()
+        self.__file.close()
+
+    def __find(self, cd_id):
+        """Returns: record offset of cd_id found by binary search on the index, or None"""
+        lo, hi = 0, self.__count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, offset = BinaryIO.INDEX_ENTRY.unpack_from(self.__mm, self.__index + mid * BinaryIO.INDEX_ENTRY.size)
+            if key == cd_id:
+                return offset
+            if key < cd_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def __read_str(self, offset):
+        """Returns: (string, offset after the string) read at offset"""
+        n = BinaryIO.COUNT.unpack_from(self.__mm, offset)[0]
+        offset += BinaryIO.COUNT.size
+        return self.__mm[offset:offset + n].decode('utf-8'), offset + n
+
+    def __symbol(self, dictionary, code):
+        """Returns: (string) the entry with code of dictionary, decoded the first time it is needed"""
+        offset, entries = dictionary
+        value = entries.get(code)
+        if value is None:
+            if code >= BinaryIO.COUNT.unpack_from(self.__mm, offset)[0]:
+                raise Exception('Code {} is not in the dictionary at {}'.format(code, offset))
+            entry = offset + BinaryIO.COUNT.size + code * BinaryIO.OFFSET.size
+            start = BinaryIO.OFFSET.unpack_from(self.__mm, entry)[0]
+            value = entries[code] = self.__read_str(start)[0]
+        return value
+
+    def __read_cd(self, offset, with_tracks):
+        """Returns: CD object decoded from the record at offset"""
+        cd_id = BinaryIO.CD_ID.unpack_from(self.__mm, offset)[0]
+        title, offset = self.__read_str(offset + BinaryIO.CD_ID.size)
+        if self.__version >= 2:
+            artist = self.__symbol(self.__artists, BinaryIO.COUNT.unpack_from(self.__mm, offset)[0])
+            offset += BinaryIO.COUNT.size
+        else:
+            artist, offset = self.__read_str(offset)
+        cd = DC.CD(cd_id, title, artist)
+        if with_tracks:
+            cd.add_tracks(self.__read_tracks(offset))
+        return cd
+
+    def __read_tracks(self, offset):
+        """Returns: list of Track objects decoded from the track count at offset"""
+        tracks = []
+        n = BinaryIO.COUNT.unpack_from(self.__mm, offset)[0]
+        offset += BinaryIO.COUNT.size
+        for _ in range(n):
+            position = BinaryIO.COUNT.unpack_from(self.__mm, offset)[0]
+            title, offset = self.__read_str(offset + BinaryIO.COUNT.size)
+            if self.__version >= 2:
+                length = self.__symbol(self.__lengths, BinaryIO.COUNT.unpack_from(self.__mm, offset)[0])
+                offset += BinaryIO.COUNT.size
+            else:
+                length, offset = self.__read_str(offset)
+            tracks.append(DC.Track(position, title, length))
+        return tracks
+
+    def get_cd(self, cd_id: int, with_tracks: bool = True) -> DC.CD:
+        """Returns the CD / Album with the ID cd_id
+        Args:
+            cd_id (int): ID of the CD object to return.
+            with_tracks (bool): False to skip decoding the tracks.
+        Raises:
+            Exception: If there is no CD with this ID.
+        Returns:
+            cd (DC.CD): CD object that matches cd_id.
+        """
+
+        offset = self.__find(cd_id)
+        if offset is None:
+            raise Exception('CD does not exist')
+        return self.__read_cd(offset, with_tracks)
+
+    def get_tracks(self, cd_id: int) -> list:
+        """Returns the tracks of the CD / Album with the ID cd_id
+        Args:
+            cd_id (int): ID of the CD.
+        Raises:
+            Exception: If there is no CD with this ID.
+        Returns:
+            tracks (list): Track objects ordered by position.
+        """
+
+        offset = self.__find(cd_id)
+        if offset is None:
+            raise Exception('CD does not exist')
+        offset += BinaryIO.CD_ID.size
+        offset += BinaryIO.COUNT.size + BinaryIO.COUNT.unpack_from(self.__mm, offset)[0]  # skip the title
+        if self.__version >= 2:
+            offset += BinaryIO.COUNT.size  # and the artist code
+        else:
+            offset += BinaryIO.COUNT.size + BinaryIO.COUNT.unpack_from(self.__mm, offset)[0]  # and the artist
+        return self.__read_tracks(offset)
+
+
+class Storage:
+    """Interface of the places an inventory is kept, the methods FileIO offers for the text files:
+    methods:
+        load(lazy): -> (DC.Inventory) the stored inventory
+        load_async(lazy): -> (coroutine of DC.Inventory) the same, without blocking the event loop
+        reload(table): -> (bool) Brings table up to date in place, False if it needs a full load instead
+        save(table): Stores the changes made to table since it was loaded or saved -> None
+        save_all(table): Replaces the stored inventory by table -> None
+        get_cd(cd_id) -> (DC.CD) the stored CD with ID cd_id and its tracks
+        close(): Releases the storage -> None
+    """
+
+    ###    Methods    ###
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self, lazy: bool = False) -> DC.Inventory:
+        raise Exception('{} cannot load'.format(type(self).__name__))
+
+    async def load_async(self, lazy: bool = False) -> DC.Inventory:
+        return await asyncio.get_running_loop().run_in_executor(None, self.load, lazy)
+
+    def reload(self, table: DC.Inventory) -> bool:
+        return False
+
+    def save(self, table: DC.Inventory) -> None:
+        raise Exception('{} cannot save'.format(type(self).__name__))
+
+    def save_all(self, table: DC.Inventory) -> None:
+        raise Exception('{} cannot save'.format(type(self).__name__))
+
+    def get_cd(self, cd_id: int) -> DC.CD:
+        raise Exception('{} cannot look up CDs'.format(type(self).__name__))
+
+    def close(self) -> None:
+        pass
+
+
+class TextFileStorage(Storage):
+    """The AlbumInventory / TrackInventory text files (and journal) through FileIO:
+    save appends the changes to the journal, save_all rewrites the files.
+    get_cd has no index to use and reads the files up to the CD; with a journal, which may change
+    any CD, it loads them lazily, without touching the snapshot or the state reload works from.
+    With a snapshot_name, loads that parse the files and save_all take a SnapshotCache snapshot,
+    and loads use the snapshot instead of the files while it is up to date. save only appends to
+    the journal, which the snapshot applies on top, so its cost does not grow with the inventory.
+    A load that reported errors takes no snapshot, so the next start parses the files, and reports
+    the errors, again.
+    reload merges what changed in the files since the last load through an IncrementalLoader.
+    """
+
+    ###    Constructor    ###
+    def __init__(self, file_name: list, snapshot_name: str = None) -> None:
+        """Keeps the list of file names [CD Inventory, Track Inventory(, Journal)]"""
+        ###    Attributes    ###
+        self.file_name = file_name
+        self.snapshot = SnapshotCache(file_name, snapshot_name) if snapshot_name else None
+        self.loader = IncrementalLoader(file_name)
+
+    ###    Methods    ###
+    def __recover(self):
+        """Completes a save cut short, before the snapshot or the loader look at the files"""
+        try:
+            FileIO.recover(self.file_name)
+        except Exception as e:
+            print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+
+    def load(self, lazy: bool = False) -> DC.Inventory:
+        self.__recover()
+        state, stamps = [], []
+        table = self.snapshot.load(lazy, state) if self.snapshot is not None else None
+        if table is None:
+            state = self.loader.scan(stamps)  # stamps and state come from one read of the files
+            errors = []
+            table = FileIO.load_inventory(self.file_name, lazy=lazy, errors=errors)
+            if self.snapshot is not None and not errors:  # a partial load must not outlive its messages
+                self.snapshot.write(table, stamps, state)
+        elif not state:
+            state = self.loader.scan()
+        self.loader.remember(table, state)
+        return table
+
+    async def load_async(self, lazy: bool = False) -> DC.Inventory:
+        """Loads through AsyncFileIO, which parses all tracks; lazy only applies to a snapshot"""
+        self.__recover()
+        state, stamps = [], []
+        table = self.snapshot.load(lazy, state) if self.snapshot is not None else None
+        if table is None:
+            state = self.loader.scan(stamps)
+            errors = []
+            table = await AsyncFileIO.load_inventory(self.file_name, errors)
+            if self.snapshot is not None and not errors:
+                self.snapshot.write(table, stamps, state)
+        elif not state:
+            state = self.loader.scan()
+        self.loader.remember(table, state)
+        return table
+
+    def reload(self, table: DC.Inventory) -> bool:
+        self.__recover()
+        return self.loader.reload(table)
+
+    def save(self, table: DC.Inventory) -> None:
+        if len(self.file_name) < 3:
+            self.save_all(table)  # without a journal every save rewrites the files
+            return
+        FileIO.save_changes(self.file_name, table)
+
+    def save_all(self, table: DC.Inventory) -> None:
+        FileIO.save_inventory(self.file_name, table)
+        if self.snapshot is not None and not any(table.get_changes()):  # only after a successful save
+            stamps = []
+            state = self.loader.scan(stamps)
+            self.snapshot.write(table, stamps, state)
+            self.loader.remember(table, state)
+
+    def get_cd(self, cd_id: int) -> DC.CD:
+        if len(self.file_name) > 2 and os.path.exists(self.file_name[2]) and os.path.getsize(self.file_name[2]):
+            return FileIO.load_inventory(self.file_name, lazy=True).get_cd(cd_id)  # the journal may change any CD
+        for cd in FileIO.iter_inventory(self.file_name, grouped=False):
+            if cd.cd_id == cd_id:
+                return cd
+        raise Exception('CD does not exist')
+
+
+class SQLiteStorage(Storage):
+    """The inventory in an SQLite database, one row per CD / Album and per track:
+    The primary keys index the cd table by ID and the track table by (ID, position), so single CDs
+    and their tracks are read without loading the rest. save writes only the CDs and tracks that
+    changed, with batched upserts in one transaction, so a failed save changes nothing.
+    methods (besides those of Storage):
+        load_tracks(cd_id) -> (list) Track objects of the CD with ID cd_id, the track source of lazy loads
+        import_text(file_name): Replaces the database content by the inventory text files -> None
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cd (cd_id INTEGER PRIMARY KEY, title TEXT NOT NULL, artist TEXT NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS track (cd_id INTEGER NOT NULL, position INTEGER NOT NULL, '
+        'title TEXT NOT NULL, length TEXT NOT NULL, PRIMARY KEY (cd_id, position)) WITHOUT ROWID',
+        'CREATE INDEX IF NOT EXISTS cd_artist ON cd (artist)',
+    )
+    UPSERT_CD = ('INSERT INTO cd (cd_id, title, artist) VALUES (?, ?, ?) '
+                 'ON CONFLICT (cd_id) DO UPDATE SET title = excluded.title, artist = excluded.artist')
+    UPSERT_TRACK = ('INSERT INTO track (cd_id, position, title, length) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (cd_id, position) DO UPDATE SET title = excluded.title, length = excluded.length')
+
+    ###    Constructor    ###
+    def __init__(self, db_file_name: str) -> None:
+        """Opens (or creates) the database db_file_name"""
+        ###    Attributes    ###
+        self.db_file_name = db_file_name
+        # lazily loaded CDs may read their tracks from the writer threads of FileIO.save_inventory
+        self.__db = sqlite3.connect(db_file_name, check_same_thread=False)
+        with self.__db:
+            for statement in SQLiteStorage.SCHEMA:
+                self.__db.execute(statement)
+
+    ###    Methods    ###
+    def close(self) -> None:
+        """Closes the database"""
+        self.__db.close()
+
+    def __len__(self) -> int:
+        return self.__db.execute('SELECT COUNT(*) FROM cd').fetchone()[0]
+
+    def __contains__(self, cd_id) -> bool:
+        return self.__db.execute('SELECT 1 FROM cd WHERE cd_id = ?', (cd_id,)).fetchone() is not None
+
+    def load(self, lazy: bool = False) -> DC.Inventory:
+        """Reads the inventory
+        Args:
+            lazy (bool): True to read the tracks of a CD only when they are first used.
+        Returns:
+            table (DC.Inventory): Inventory of CD objects.
+        """
+
+        table = DC.Inventory()
+        table.extend(DC.CD(*row) for row in self.__db.execute('SELECT cd_id, title, artist FROM cd ORDER BY cd_id'))
+        if lazy:
+            with_tracks = {row[0] for row in self.__db.execute('SELECT DISTINCT cd_id FROM track')}
+            for cd in table:
+                if cd.cd_id in with_tracks:
+                    cd.set_track_source(self)
+        else:
+            cd = None
+            tracks = []
+            for cd_id, position, title, length in self.__db.execute(
+                    'SELECT cd_id, position, title, length FROM track ORDER BY cd_id, position'):
+                if cd is None or cd_id != cd.cd_id:
+                    if cd is not None:
+                        cd.add_tracks(tracks)
+                    cd = table.get_cd(cd_id)
+                    tracks = []
+                tracks.append(DC.Track(position, title, length))
+            if cd is not None:
+                cd.add_tracks(tracks)
+        table.mark_clean()
+        return table
+
+    def load_tracks(self, cd_id: int) -> list:
+        """Returns: (list) Track objects of the CD with ID cd_id, ordered by position"""
+        return [DC.Track(*row) for row in self.__db.execute(
+            'SELECT position, title, length FROM track WHERE cd_id = ? ORDER BY position', (cd_id,))]
+
+    def get_cd(self, cd_id: int) -> DC.CD:
+        """Returns the CD / Album with the ID cd_id and its tracks
+        Args:
+            cd_id (int): ID of the CD object to return.
+        Raises:
+            Exception: If there is no CD with this ID.
+        Returns:
+            cd (DC.CD): CD object that matches cd_id.
+        """
+
+        row = self.__db.execute('SELECT cd_id, title, artist FROM cd WHERE cd_id = ?', (cd_id,)).fetchone()
+        if row is None:
+            raise Exception('CD does not exist')
+        cd = DC.CD(*row)
+        cd.add_tracks(self.load_tracks(cd_id))
+        cd.mark_clean()
+        return cd
+
+    def save(self, table: DC.Inventory) -> None:
+        """Writes the CDs and tracks added, changed or removed since the last load or save
+        Args:
+            table (DC.Inventory): Inventory of CD objects.
+        Returns:
+            None.
+        """
+
+        cds, removed = table.get_changes()
+        cd_rows = []
+        track_rows = []
+        deleted_tracks = []
+        for disc in cds:
+            header, positions = disc.get_changes()
+            if header:
+                cd_rows.append((disc.cd_id, disc.cd_title, disc.cd_artist))
+            tracks = {track.position: track for track in disc.cd_tracks} if positions else {}
+            for position in positions:
+                track = tracks.get(position)
+                if track is None:
+                    deleted_tracks.append((disc.cd_id, position))
+                else:
+                    track_rows.append((disc.cd_id, position, track.title, track.length))
+        try:
+            with self.__db:
+                self.__db.executemany('DELETE FROM track WHERE cd_id = ?', ((cd_id,) for cd_id in removed))
+                self.__db.executemany('DELETE FROM cd WHERE cd_id = ?', ((cd_id,) for cd_id in removed))
+                self.__db.executemany(SQLiteStorage.UPSERT_CD, cd_rows)
+                self.__db.executemany('DELETE FROM track WHERE cd_id = ? AND position = ?', deleted_tracks)
+                self.__db.executemany(SQLiteStorage.UPSERT_TRACK, track_rows)
+            table.mark_clean()
+        except Exception as e:
+            print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+
+    def save_all(self, table) -> None:
+        """Replaces the database content by table in one transaction
+        Args:
+            table (DC.Inventory): Inventory of CD objects.
+        Returns:
+            None.
+        """
+
+        cd_rows = [(disc.cd_id, disc.cd_title, disc.cd_artist) for disc in table]
+        track_rows = [(disc.cd_id, track.position, track.title, track.length)
+                      for disc in table for track in disc.cd_tracks]
+        try:
+            with self.__db:
+                self.__db.execute('DELETE FROM track')
+                self.__db.execute('DELETE FROM cd')
+                self.__db.executemany('INSERT INTO cd (cd_id, title, artist) VALUES (?, ?, ?)', cd_rows)
+                self.__db.executemany('INSERT INTO track (cd_id, position, title, length) VALUES (?, ?, ?, ?)',
+                                      track_rows)
+            if isinstance(table, DC.Inventory):
+                table.mark_clean()
+        except Exception as e:
+            print('There was a general error!', e, e.__doc__, type(e), sep='\n')
+
+    def import_text(self, file_name: list) -> int:
+        """Migrates the inventory text files (with the journal applied) into the database
+        Args:
+            file_name (list): list of file names [CD Inventory, Track Inventory(, Journal)] that hold the data.
+        Returns:
+            count (int): number of CD / Albums imported.
+        """
+
+        table = FileIO.load_inventory(file_name)
+        self.save_all(table)
+        return len(table)
+
 
 class ScreenIO:
     """Handling Input / Output
@@ -84,8 +1902,16 @@ class ScreenIO:
         menu_choice: -> (string) of the choice the user selects
         print_CD_menu: (string) Prints a list of Objects -> None
         menu_CD_choice: -> (string) of the choice the user selects
-        show_inventory (table): (string) Prints a list of Objects -> None
-        show_tracks (cd): (string) Prints a list of Objects -> None
+        show_inventory (table, page): Prints one page of the inventory -> (tuple) page shown, number of pages
+        browse_inventory (table): Pages through the inventory on user request -> None
+        page_of (table, cd_id): -> (int) the page of the inventory that shows cd_id
+        show_tracks (cd, page): Prints one page of the tracks of a CD -> (tuple) page shown, number of pages
+        browse_tracks (cd): Pages through the tracks of a CD on user request -> None
+        show_search_results (table, results): Prints the CDs and tracks found by a search -> None
+        show_statistics (stats): Prints runtime statistics of the inventory -> None
+        show_instrumentation (report, enabled): Prints the timings recorded by Instrumentation -> None
+        instrumentation_choice (): -> (string) of the stats menu choice the user selects
+        show_batch_report (report): Prints the outcome of a batch run -> None
         get_CD_info (table)-> (object) containing cdId, cdTitle, cdArtist
         get_track_info (cd): -> (object) ocontaining trkId, trkTitle, trkLength
 
@@ -100,7 +1926,8 @@ class ScreenIO:
         """
 
         print('Main Menu\n\n[l] load Inventory from file\n[a] Add CD / Album\n[d] Display Current Inventory')
-        print('[c] Choose CD / Album\n[s] Save Inventory to file\n[x] exit\n')
+        print('[c] Choose CD / Album\n[f] Find CD / Album or Track\n[t] Show statistics')
+        print('[p] Performance statistics\n[s] Save Inventory to file\n[x] exit\n')
 
     @staticmethod
     def menu_choice():
@@ -108,12 +1935,12 @@ class ScreenIO:
         Args:
             None.
         Returns:
-            choice (string): a lower case sting of the users input out of the choices l, a, d, c, s or x
+            choice (string): a lower case sting of the users input out of the choices l, a, d, c, f, t, p, s or x
         """
 
         choice = ' '
-        while choice not in ['l', 'a', 'd', 'c', 's', 'x']:
-            choice = input('Which operation would you like to perform? [l, a, d, c, s or x]: ').lower().strip()
+        while choice not in ['l', 'a', 'd', 'c', 'f', 't', 'p', 's', 'x']:
+            choice = input('Which operation would you like to perform? [l, a, d, c, f, t, p, s or x]: ').lower().strip()
         print()  # Add extra space for layout
         return choice
 
@@ -143,68 +1970,286 @@ class ScreenIO:
         print()  # Add extra space for layout
         return choice
 
+    PAGE_SIZE = 20  # rows per page of show_inventory and show_tracks
+
     @staticmethod
-    def show_inventory(table):
-        """Displays current inventory table
+    def __rows_with_gaps(rows, previous, single, several):
+        """Returns: (list) the text of rows, with a line for every gap between their IDs
         Args:
-            table (list of objects): 2D data structure (list of objects) that holds the data during runtime.
+            rows (list): (id, text) tuples in ID order.
+            previous (int): ID of the row before the first one, 0 if there is none.
+            single (string): line for a gap of one ID.
+            several (string): format string for a gap of several IDs, gets the first and last ID.
+        """
+
+        lines = []
+        expected = previous + 1
+        for row_id, text in rows:
+            if row_id == expected + 1:
+                lines.append(single)
+            elif row_id > expected:
+                lines.append(several.format(expected, row_id - 1))
+            lines.append(text)
+            expected = row_id + 1
+        return lines
+
+    @staticmethod
+    def __pages(n, page, page_size):
+        """Returns: (tuple) page clamped to the valid range, number of pages for n rows"""
+        pages = max(1, -(-n // page_size))
+        return min(max(page, 1), pages), pages
+
+    @staticmethod
+    def __pager(show_page, find_page, prompt):
+        """Shows pages until the user exits
+        Args:
+            show_page (function): shows page (int) and returns (page shown, number of pages).
+            find_page (function): returns the page that shows the ID / position (int).
+            prompt (string): what to ask for when jumping.
         Returns:
             None.
         """
 
-        
-        table = DC.CD.sort(table)
-        # for cd in table:
-        #     if cd is None:
-        #         print('None')
-        #         continue
-        #     print(cd.cd_id)
-        print('======= The Current Inventory: =======')
-        print('ID\tCD Title (by: Artist)\n')
-        for cd in table:
-            if cd is None:
-                print('No information for this Album')
+        page, pages = show_page(1)
+        while pages > 1:
+            choice = input('[n] next page, [p] previous page, [j] jump to {}, [x] exit: '.format(prompt)).lower().strip()
+            if choice == 'x':
+                break
+            elif choice == 'n':
+                page += 1
+            elif choice == 'p':
+                page -= 1
+            elif choice == 'j':
+                try:
+                    page = find_page(int(input('Enter {}: '.format(prompt)).strip()))
+                except ValueError:
+                    print('Invalid Input! Try again.')
+                    continue
+            else:
                 continue
-            print(cd)
-        print('======================================')
+            page, pages = show_page(page)
+
+    @staticmethod
+    def page_of(table, cd_id, page_size=None):
+        """Returns: (int) the page of show_inventory that shows the CD with ID cd_id, or where it would be"""
+        return table.index_of(cd_id) // (page_size or ScreenIO.PAGE_SIZE) + 1
+
+    @staticmethod
+    def show_inventory(table, page=1, page_size=None):
+        """Displays one page of the current inventory table, ordered by ID
+        The page is written with a single write and only the rows on it are looked at.
+        Args:
+            table (DC.Inventory): Inventory of CD objects that holds the data during runtime.
+            page (int): page to show, counted from 1.
+            page_size (int, optional): CDs per page, defaults to ScreenIO.PAGE_SIZE.
+        Returns:
+            (page, pages) (tuple): the page shown and the number of pages.
+        """
+
+        page_size = page_size or ScreenIO.PAGE_SIZE
+        if not isinstance(table, DC.Inventory):
+            table = DC.CD.sort(table)
+            cds_page = lambda start, count: table[max(start, 0):max(start, 0) + count]
+        else:
+            cds_page = table.page
+        page, pages = ScreenIO.__pages(len(table), page, page_size)
+        start = (page - 1) * page_size
+        cds = cds_page(start, page_size)
+        previous = cds_page(start - 1, 1)[0].cd_id if start > 0 else 0
+        lines = ['======= The Current Inventory: =======', 'ID\tCD Title (by: Artist)\n']
+        lines += ScreenIO.__rows_with_gaps([(cd.cd_id, str(cd)) for cd in cds], previous,
+                                           'No information for this Album', 'No information for Albums {} - {}')
+        if pages > 1:
+            lines.append('--- page {} of {} ({} Albums) ---'.format(page, pages, len(table)))
+        lines.append('======================================\n')
+        sys.stdout.write('\n'.join(lines))
+        return page, pages
+
+    @staticmethod
+    def browse_inventory(table, page_size=None):
+        """Displays the inventory page by page with next / previous / jump to ID
+        Args:
+            table (DC.Inventory): Inventory of CD objects that holds the data during runtime.
+            page_size (int, optional): CDs per page, defaults to ScreenIO.PAGE_SIZE.
+        Returns:
+            None.
+        """
+
+        ScreenIO.__pager(lambda page: ScreenIO.show_inventory(table, page, page_size),
+                         lambda cd_id: ScreenIO.page_of(table, cd_id, page_size), 'ID')
 
     @staticmethod
-    def show_tracks(cd):
-        """Displays the Tracks on a CD / Album
+    def show_tracks(cd, page=1, page_size=None):
+        """Displays one page of the Tracks on a CD / Album
         Args:
             cd (CD): CD object.
+            page (int): page to show, counted from 1.
+            page_size (int, optional): tracks per page, defaults to ScreenIO.PAGE_SIZE.
+        Returns:
+            (page, pages) (tuple): the page shown and the number of pages.
+        """
+
+        page_size = page_size or ScreenIO.PAGE_SIZE
+        tracks = cd.cd_tracks
+        page, pages = ScreenIO.__pages(len(tracks), page, page_size)
+        start = (page - 1) * page_size
+        previous = tracks[start - 1].position if start > 0 else 0
+        lines = ['====== Current CD / Album: ======', str(cd), '=================================']
+        if tracks:
+            lines += ScreenIO.__rows_with_gaps([(track.position, str(track)) for track in tracks[start:start + page_size]],
+                                               previous, 'No Information for this track',
+                                               'No Information for tracks {} - {}')
+        else:
+            lines.append('No tracks saved for this Album')
+        if pages > 1:
+            lines.append('--- page {} of {} ({} tracks) ---'.format(page, pages, len(tracks)))
+        lines.append('=================================\n')
+        sys.stdout.write('\n'.join(lines))
+        return page, pages
+
+    @staticmethod
+    def browse_tracks(cd, page_size=None):
+        """Displays the tracks of a CD / Album page by page with next / previous / jump to position
+        Args:
+            cd (CD): CD object.
+            page_size (int, optional): tracks per page, defaults to ScreenIO.PAGE_SIZE.
+        Returns:
+            None.
+        """
+
+        size = page_size or ScreenIO.PAGE_SIZE
+        ScreenIO.__pager(lambda page: ScreenIO.show_tracks(cd, page, size),
+                         lambda position: sum(1 for track in cd.cd_tracks if track.position < position) // size + 1,
+                         'position')
+
+    @staticmethod
+    def show_search_results(table, results):
+        """Displays the CDs / Albums and Tracks found by a search
+        Args:
+            table (DC.Inventory): Inventory of CD objects.
+            results (list): (cd_id, position) tuples as returned by PC.SearchIndex.search, position 0 for an Album.
         Returns:
             None.
         """
 
-        print('====== Current CD / Album: ======')
-        print(cd)
-        print('=================================')
-        print(cd.get_tracks())
-        print('=================================')
+        print('======= Search Results: =======')
+        if not results:
+            print('Nothing found')
+        for cd_id, position in results:
+            cd = table.get_cd(cd_id)
+            if position == 0:
+                print(cd)
+            else:
+                for track in cd.cd_tracks:
+                    if track.position == position:
+                        print('{}\t{} / track {}'.format(cd_id, cd.cd_title, track))
+        print('===============================')
+
+    @staticmethod
+    def show_statistics(stats, n: int = 10):
+        """Displays runtime statistics of the inventory
+        Args:
+            stats (PC.CatalogueStats): statistics of the inventory.
+            n (int): number of artists and tracks to list.
+        Returns:
+            None.
+        """
+
+        albums = stats.album_runtimes()
+        total = sum(seconds for _, seconds, _ in albums)
+        print('======= Inventory Statistics: =======')
+        print('{} Albums, total runtime {}'.format(len(albums), DC.format_seconds(total)))
+        if albums:
+            print('average runtime per Album {}'.format(DC.format_seconds(total / len(albums))))
+        print('\nArtists by total runtime (average per track):')
+        for artist, seconds, average in stats.artist_runtimes()[:n]:
+            print('{}\t{} ({})'.format(DC.format_seconds(seconds), artist, DC.format_seconds(average)))
+        print('\nTracks per Album:')
+        for tracks, count in stats.track_count_histogram():
+            print('{:>4} tracks: {} Albums'.format(tracks, count))
+        print('\nLongest tracks:')
+        for cd_id, position, seconds in stats.longest_tracks(n):
+            print('{}\tCD {} track {}'.format(DC.format_seconds(seconds), cd_id, position))
+        print('=====================================')
+
+    @staticmethod
+    def show_instrumentation(report, enabled):
+        """Displays the timings recorded by Instrumentation, the most expensive method first
+        Args:
+            report (dict): Instrumentation.report().
+            enabled (bool): True if instrumentation is on.
+        Returns:
+            None.
+        """
+
+        lines = ['======= Performance Statistics: =======',
+                 'instrumentation is {}'.format('ON' if enabled else 'OFF, turn it on with [e]')]
+        if report:
+            lines.append('{:<30} {:>8} {:>9} {:>8} {:>8} {:>8} {:>8} {:>10} {:>10} {:>9}'.format(
+                'method', 'calls', 'total s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'read', 'written', 'rows'))
+            for name, entry in report.items():
+                lines.append('{:<30} {:>8} {:>9.3f} {:>8.3f} {:>8.3f} {:>8.3f} {:>8.3f} {:>10} {:>10} {:>9}{}'.format(
+                    name, entry['calls'], entry['seconds'], entry['p50_ms'], entry['p90_ms'], entry['p99_ms'],
+                    entry['max_ms'], entry['bytes_read'], entry['bytes_written'], entry['rows'],
+                    ' ({} errors)'.format(entry['errors']) if entry['errors'] else ''))
+        else:
+            lines.append('nothing recorded yet')
+        lines.append('=======================================\n')
+        sys.stdout.write('\n'.join(lines))
+
+    @staticmethod
+    def instrumentation_choice():
+        """Gets user input for the performance statistics menu
+        Args:
+            None.
+        Returns:
+            choice (string): a lower case sting of the users input out of the choices e, r, w, c or x
+        """
+
+        print('[e] turn instrumentation on / off\n[r] reset\n[w] write to file\n'
+              '[c] cProfile the next menu operation\n[x] exit to Main Menu')
+        choice = ' '
+        while choice not in ['e', 'r', 'w', 'c', 'x']:
+            choice = input('Which operation would you like to perform? [e, r, w, c or x]: ').lower().strip()
+        print()  # Add extra space for layout
+        return choice
+
+    @staticmethod
+    def show_batch_report(report):
+        """Displays the outcome of PC.BatchProcessor.run, with every failed line
+        Args:
+            report (dict): report returned by PC.BatchProcessor.run.
+        Returns:
+            None.
+        """
+
+        lines = ['line {}: {}'.format(number, message) for number, message in report['errors']]
+        lines.append('{} operations in {:.3f} s ({:,.0f} ops/sec), {} failed'.format(
+            report['ops'], report['seconds'], report['ops_per_sec'] or 0, len(report['errors'])))
+        sys.stdout.write('\n'.join(lines) + '\n')
 
     @staticmethod
     def get_CD_info(table):
         """function to request CD information from User to add CD to inventory
+        Args:
+            table (DC.Inventory): Inventory of CD objects, used to reject IDs that are already taken
+                and to suggest the lowest free one.
         Returns:
             cdId (string): Holds the ID of the CD dataset.
             cdTitle (string): Holds the title of the CD.
             cdArtist (string): Holds the artist of the CD.
         """
 
+        intFree = table.next_free_id()
         while True:
             try:
-                cdId = int(input('Enter ID: ').strip())
+                cdId = int(input('Enter ID [{}]: '.format(intFree)).strip() or intFree)
             except ValueError:
                 print('Invalid Input! Try again.')
                 continue
-            found = False
-            for cd in table:
-                if cd.cd_id == cdId:
-                    print('Album with ID {} already exists. Choose another ID number'.format(cdId))
-                    found = True
-                    break
-            if not found:
+            if cdId in table:
+                print('Album with ID {} already exists. Choose another ID number'.format(cdId))
+            else:
                 break
 
 
@@ -229,25 +2274,24 @@ class ScreenIO:
     @staticmethod
     def get_track_info(cd):
         """function to request Track information from User to add Track to CD / Album
+        Args:
+            cd (DC.CD): CD object, used to reject positions that are already taken and to suggest the lowest free one.
         Returns:
             trkId (string): Holds the ID of the Track dataset.
             trkTitle (string): Holds the title of the Track.
             trkLength (string): Holds the length (time) of the Track.
         """
 
+        intFree = cd.next_free_position()
         while True:
             try:
-                trkId = int(input('Enter Position on CD / Album: ').strip())
+                trkId = int(input('Enter Position on CD / Album [{}]: '.format(intFree)).strip() or intFree)
             except ValueError:
                 print('Invalid Input! Try again.')
                 continue
-            found = False
-            for track in cd.cd_tracks:
-                if track is not None and track.position == trkId:
-                    print('Track with ID {} already exists. Choose another ID number'.format(trkId))
-                    found = True
-                    break
-            if not found:
+            if cd.has_track(trkId):
+                print('Track with ID {} already exists. Choose another ID number'.format(trkId))
+            else:
                 break
 
         while True:
@@ -0,0 +1,267 @@
+#------------------------------------------#
+# Title: Instrumentation
+# Desc: A Module to measure the hot paths of the CD Inventory on request
+#------------------------------------------#
+
+if __name__ == '__main__':
+    raise Exception('This file is not meant to run by itself')
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import time
+
+import DataClasses as DC
+import IOClasses as IO
+import ProcessingClasses as PC
+
+
+def _arg(args, kwargs, i, name, default=None):
+    """Returns: the argument at position i or with keyword name of a call, default if it was not passed"""
+    if len(args) > i:
+        return args[i]
+    return kwargs.get(name, default)
+
+
+def _file_size(name) -> int:
+    """Returns: (int) the size of the file name in bytes, 0 if it does not exist"""
+    try:
+        return os.path.getsize(name)
+    except OSError:
+        return 0
+
+
+def _count_rows(table) -> int:
+    """Returns: (int) the number of CD / Albums and tracks in table"""
+    return sum(1 + len(cd.cd_tracks) for cd in table)
+
+
+def _meter_load(args, kwargs, result, before):
+    file_name = _arg(args, kwargs, 0, 'file_name')
+    lazy = _arg(args, kwargs, 3, 'lazy', False)
+    rows = len(result) if lazy else _count_rows(result)  # lazy tracks are counted by TrackFileIndex.load_tracks
+    return {'bytes_read': sum(_file_size(name) for name in file_name), 'rows': rows}
+
+
+def _meter_save(args, kwargs, result, before):
+    file_name = _arg(args, kwargs, 0, 'file_name')
+    return {'bytes_written': sum(_file_size(name) for name in file_name[:2]),
+            'rows': _count_rows(_arg(args, kwargs, 1, 'lst_Inventory'))}
+
+
+def _journal_size(args, kwargs):
+    file_name = _arg(args, kwargs, 0, 'file_name')
+    return _file_size(file_name[2]) if len(file_name) > 2 else 0
+
+
+def _meter_save_changes(args, kwargs, result, before):
+    return {'bytes_written': max(0, _journal_size(args, kwargs) - before)}
+
+
+def _meter_replay(args, kwargs, result, before):
+    return {'bytes_read': _file_size(_arg(args, kwargs, 0, 'file_name_Journal'))}
+
+
+def _meter_rows(args, kwargs, result, before):
+    return {'rows': len(result)}
+
+
+class Instrumentation:
+    """Opt-in timing of FileIO, DataProcessor and the CD / Track mutation methods:
+    enable() replaces the methods in TARGETS by timed wrappers and disable() puts the originals back,
+    so nothing is measured, and nothing costs time, while instrumentation is off.
+    Every method records its calls, errors, total time and a random sample of up to SAMPLE_SIZE
+    latencies for the percentiles; the file methods also record bytes read / written and rows.
+    methods:
+        enable(): -> None
+        disable(): -> None
+        is_enabled(): -> (bool) True while the methods are instrumented
+        reset(): -> None
+        report(): -> (dict) statistics keyed by method
+        dump(file_name): -> None
+        start_profile(): -> None
+        stop_profile(file_name, n): -> (str) the n most expensive functions of the profiled operation
+    """
+
+    SAMPLE_SIZE = 10000  # latencies kept per method for the percentiles
+    # (class, attribute, kind, meter, before): kind is 'static' for static methods, 'method' or
+    # 'setter' for the setter of a property; meter(args, kwargs, result, before) returns the bytes
+    # and rows of a call, before(args, kwargs) is called ahead of it
+    TARGETS = (
+        (IO.FileIO, 'load_inventory', 'static', _meter_load, None),
+        (IO.FileIO, 'save_inventory', 'static', _meter_save, None),
+        (IO.FileIO, 'save_changes', 'static', _meter_save_changes, _journal_size),
+        (IO.FileIO, 'compact_inventory', 'static', None, None),
+        (IO.FileIO, 'replay_journal', 'static', _meter_replay, None),
+        (IO.TrackFileIndex, 'load_tracks', 'method', _meter_rows, None),
+        (PC.DataProcessor, 'add_CD', 'static', None, None),
+        (PC.DataProcessor, 'select_cd', 'static', None, None),
+        (PC.DataProcessor, 'add_track', 'static', None, None),
+        (PC.DataProcessor, 'rmv_track', 'static', None, None),
+        (DC.CD, 'add_track', 'method', None, None),
+        (DC.CD, 'add_tracks', 'method', None, None),
+        (DC.CD, 'rmv_track', 'method', None, None),
+        (DC.CD, 'cd_id', 'setter', None, None),
+        (DC.CD, 'cd_title', 'setter', None, None),
+        (DC.CD, 'cd_artist', 'setter', None, None),
+        (DC.CD, 'cd_tracks', 'setter', None, None),
+        (DC.Inventory, 'append', 'method', None, None),
+        (DC.Inventory, 'remove', 'method', None, None),
+        (DC.Track, 'position', 'setter', None, None),
+        (DC.Track, 'title', 'setter', None, None),
+        (DC.Track, 'length', 'setter', None, None),
+    )
+
+    __originals = {}  # (class, attribute) -> the attribute before enable()
+    __stats = {}  # method name -> counters and latency sample
+    __random = random.Random(0)
+    __profile = None
+
+    ###    Methods    ###
+    @staticmethod
+    def __stat(name):
+        stat = Instrumentation.__stats.get(name)
+        if stat is None:
+            stat = {'calls': 0, 'errors': 0, 'seconds': 0.0, 'samples': [],
+                    'bytes_read': 0, 'bytes_written': 0, 'rows': 0}
+            Instrumentation.__stats[name] = stat
+        return stat
+
+    @staticmethod
+    def __wrap(name, func, meter, before):
+        """Returns: func wrapped to record its calls, latency, bytes and rows under name"""
+        clock = time.perf_counter
+        sample_size = Instrumentation.SAMPLE_SIZE
+        rnd = Instrumentation.__random
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            stat = Instrumentation.__stat(name)
+            state = before(args, kwargs) if before is not None else None
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                stat['errors'] += 1
+                raise
+            finally:
+                elapsed = clock() - start
+                stat['calls'] += 1
+                stat['seconds'] += elapsed
+                samples = stat['samples']
+                if len(samples) < sample_size:
+                    samples.append(elapsed)
+                else:
+                    i = rnd.randrange(stat['calls'])
+                    if i < sample_size:
+                        samples[i] = elapsed
+            if meter is not None:
+                for key, value in meter(args, kwargs, result, state).items():
+                    stat[key] += value
+            return result
+        return timed
+
+    @staticmethod
+    def enable() -> None:
+        """Replaces every method in TARGETS by a timed wrapper, does nothing if already enabled"""
+        if Instrumentation.__originals:
+            return
+        for cls, attribute, kind, meter, before in Instrumentation.TARGETS:
+            original = cls.__dict__[attribute]
+            name = '{}.{}'.format(cls.__name__, attribute)
+            if kind == 'static':
+                wrapped = staticmethod(Instrumentation.__wrap(name, original.__func__, meter, before))
+            elif kind == 'setter':
+                wrapped = original.setter(Instrumentation.__wrap(name + ' (set)', original.fset, meter, before))
+            else:
+                wrapped = Instrumentation.__wrap(name, original, meter, before)
+            Instrumentation.__originals[(cls, attribute)] = original
+            setattr(cls, attribute, wrapped)
+
+    @staticmethod
+    def disable() -> None:
+        """Puts the original methods back, the statistics are kept"""
+        for (cls, attribute), original in Instrumentation.__originals.items():
+            setattr(cls, attribute, original)
+        Instrumentation.__originals.clear()
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return bool(Instrumentation.__originals)
+
+    @staticmethod
+    def reset() -> None:
+        """Discards all statistics recorded so far"""
+        Instrumentation.__stats.clear()
+
+    @staticmethod
+    def __percentile(ordered, fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    @staticmethod
+    def report() -> dict:
+        """Summarizes the statistics recorded so far
+        Returns:
+            report (dict): for every method that was called: calls, errors, total seconds, the mean,
+            50th, 90th and 99th percentile and maximum latency in milliseconds, bytes read and
+            written and rows, ordered by total seconds, the most expensive first.
+        """
+
+        report = {}
+        for name, stat in sorted(Instrumentation.__stats.items(), key=lambda item: -item[1]['seconds']):
+            ordered = sorted(stat['samples'])
+            entry = {'calls': stat['calls'], 'errors': stat['errors'], 'seconds': stat['seconds'],
+                     'mean_ms': 1000 * stat['seconds'] / stat['calls']}
+            for key, fraction in (('p50_ms', 0.5), ('p90_ms', 0.9), ('p99_ms', 0.99)):
+                entry[key] = 1000 * Instrumentation.__percentile(ordered, fraction)
+            entry['max_ms'] = 1000 * ordered[-1]
+            for key in ('bytes_read', 'bytes_written', 'rows'):
+                entry[key] = stat[key]
+            report[name] = entry
+        return report
+
+    @staticmethod
+    def dump(file_name: str) -> None:
+        """Writes report() to file_name as JSON
+        Args:
+            file_name (string): name of the file to write.
+        Returns:
+            None.
+        """
+
+        with open(file_name, 'w') as file:
+            json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'enabled': Instrumentation.is_enabled(),
+                       'methods': Instrumentation.report()}, file, indent=2)
+
+    @staticmethod
+    def start_profile() -> None:
+        """Starts a cProfile capture, for example of a single menu operation"""
+        Instrumentation.__profile = cProfile.Profile()
+        Instrumentation.__profile.enable()
+
+    @staticmethod
+    def stop_profile(file_name: str = None, n: int = 20) -> str:
+        """Stops the capture started by start_profile
+        Args:
+            file_name (string, optional): file to save the raw profile to, readable with pstats.
+            n (int): number of functions listed.
+        Raises:
+            Exception: If no capture is running.
+        Returns:
+            text (string): the n functions with the most cumulative time.
+        """
+
+        profile = Instrumentation.__profile
+        if profile is None:
+            raise Exception('No profile is being captured')
+        profile.disable()
+        Instrumentation.__profile = None
+        if file_name is not None:
+            profile.dump_stats(file_name)
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats('cumulative').print_stats(n)
+        return text.getvalue()
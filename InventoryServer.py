@@ -0,0 +1,306 @@
+#------------------------------------------#
+# Title: InventoryServer
+# Desc: A local server holding one inventory for several CD_Inventory clients
+#------------------------------------------#
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import threading
+
+import DataClasses as DC
+import IOClasses as IO
+import ProcessingClasses as PC
+
+
+class RWLock:
+    """Lock that lets any number of readers in at the same time, or one writer:
+    A waiting writer keeps new readers out, so a steady stream of reads cannot starve it.
+    methods:
+        read(): -> (context manager) holding the lock for reading
+        write(): -> (context manager) holding the lock for writing
+    """
+
+    ###    Constructor    ###
+    def __init__(self) -> None:
+        ###    Attributes    ###
+        self.__condition = threading.Condition()
+        self.__readers = 0
+        self.__writer = False
+        self.__writers_waiting = 0
+
+    ###    Methods    ###
+    @contextlib.contextmanager
+    def read(self):
+        with self.__condition:
+            while self.__writer or self.__writers_waiting:
+                self.__condition.wait()
+            self.__readers += 1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__condition.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        with self.__condition:
+            self.__writers_waiting += 1
+            while self.__writer or self.__readers:
+                self.__condition.wait()
+            self.__writers_waiting -= 1
+            self.__writer = True
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__writer = False
+                self.__condition.notify_all()
+
+
+class InventoryServer:
+    """Holds one inventory in memory and serves it over a Unix domain socket:
+    Every request is one line with a JSON array of the operation and its arguments, every response
+    one line with [true, result] or [false, error message]:
+        ["ping"]                                    -> "pong"
+        ["albums", with_tracks]                     -> [[cd_id, title, artist, tracks], ...] ordered by ID;
+                                                       tracks is [[position, title, length], ...] with
+                                                       with_tracks, otherwise the number of tracks
+        ["get", cd_id]                              -> [cd_id, title, artist, [[position, title, length], ...]]
+        ["tracks", cd_id]                           -> [[position, title, length], ...]
+        ["add_cd", cd_id, title, artist]            -> null
+        ["add_track", cd_id, position, title, length] -> null
+        ["remove_track", cd_id, position]           -> null
+        ["apply", [journal line, ...]]              -> [[line number, error message], ...], then saved;
+                                                       an N line (a new CD) fails if the ID is taken, an
+                                                       E line (a changed CD) if the CD no longer exists
+        ["save"]                                    -> null, saves the changes
+        ["compact"]                                 -> null, rewrites the whole storage
+    Reads share an RWLock, changes and saves hold it alone. Each client connection gets a thread.
+    methods:
+        handle(request): -> (list) the response to one decoded request
+        serve_forever(): Serves until shutdown() -> None
+        shutdown(): Stops serving and closes the socket -> None
+    """
+
+    READS = ('ping', 'albums', 'get', 'tracks')
+
+    ###    Constructor    ###
+    def __init__(self, storage: IO.Storage, socket_path: str) -> None:
+        """Loads the inventory from storage and listens on socket_path"""
+        ###    Attributes    ###
+        self.storage = storage
+        self.socket_path = socket_path
+        self.table = storage.load()
+        self.lock = RWLock()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # left behind by a server that did not shut down
+        self.__server = socketserver.ThreadingUnixStreamServer(socket_path, _Handler)
+        self.__server.daemon_threads = True
+        self.__server.inventory = self
+
+    ###    Methods    ###
+    @staticmethod
+    def __rows(cd):
+        return [[track.position, track.title, track.length] for track in cd.cd_tracks]
+
+    def __read(self, op, args):
+        if op == 'ping':
+            return 'pong'
+        if op == 'albums':
+            with_tracks = bool(args and args[0])
+            return [[cd.cd_id, cd.cd_title, cd.cd_artist,
+                     InventoryServer.__rows(cd) if with_tracks else len(cd.cd_tracks)]
+                    for cd in self.table.ordered()]
+        cd = PC.DataProcessor.select_cd(self.table, args[0])
+        if op == 'get':
+            return [cd.cd_id, cd.cd_title, cd.cd_artist, InventoryServer.__rows(cd)]
+        return InventoryServer.__rows(cd)
+
+    def __write(self, op, args):
+        if op == 'add_cd':
+            PC.DataProcessor.add_CD(tuple(args), self.table)
+        elif op == 'add_track':
+            PC.DataProcessor.add_track(tuple(args[1:]), PC.DataProcessor.select_cd(self.table, args[0]))
+        elif op == 'remove_track':
+            PC.DataProcessor.rmv_track(int(args[1]), PC.DataProcessor.select_cd(self.table, args[0]))
+        elif op == 'apply':
+            errors = IO.FileIO.apply_journal(args[0], self.table)
+            self.storage.save(self.table)
+            return errors
+        elif op == 'save':
+            self.storage.save(self.table)
+        elif op == 'compact':
+            self.storage.save_all(self.table)
+        else:
+            raise Exception('Unknown operation {!r}'.format(op))
+        return None
+
+    def handle(self, request: list) -> list:
+        """Answers one request
+        Args:
+            request (list): the operation and its arguments.
+        Returns:
+            response (list): [True, result] or [False, error message].
+        """
+
+        try:
+            op, args = request[0], request[1:]
+            if op in InventoryServer.READS:
+                with self.lock.read():
+                    return [True, self.__read(op, args)]
+            with self.lock.write():
+                return [True, self.__write(op, args)]
+        except Exception as e:
+            return [False, str(e)]
+
+    def serve_forever(self) -> None:
+        self.__server.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stops serve_forever (called from another thread) and removes the socket"""
+        self.__server.shutdown()
+        self.__server.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One client connection: answers request lines until the client disconnects"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = [False, 'Bad request: {}'.format(e)]
+            else:
+                response = self.server.inventory.handle(request)
+            self.wfile.write(json.dumps(response, separators=(',', ':')).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class ServerStorage(IO.Storage):
+    """An InventoryServer as the storage of a CD_Inventory client:
+    load reads the albums from the server and, with lazy=True, the tracks of a CD when it is first used.
+    save sends the changes as journal lines, which the server applies to its inventory and saves,
+    so operators editing different CDs no longer overwrite each other's work. New CDs are sent as
+    N lines, so a CD another operator added with the same ID first is not replaced, and changed CDs
+    as E lines, so a CD another operator removed is not brought back.
+    methods (besides those of IO.Storage):
+        request(op, *args): -> (object) the result of one request
+        load_tracks(cd_id) -> (list) Track objects of the CD with ID cd_id
+    """
+
+    ###    Constructor    ###
+    def __init__(self, socket_path: str) -> None:
+        """Connects to the server listening on socket_path"""
+        ###    Attributes    ###
+        self.socket_path = socket_path
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.__socket.connect(socket_path)
+        except OSError as e:
+            self.__socket.close()
+            raise Exception('No inventory server at {}: {}'.format(socket_path, e))
+        self.__file = self.__socket.makefile('rwb')
+        self.__lock = threading.Lock()  # lazy track loads and background reloads share the connection
+
+    ###    Methods    ###
+    def request(self, op: str, *args):
+        """Sends one request and waits for the response
+        Raises:
+            Exception: With the error message of the server.
+        Returns:
+            result (object): the decoded result.
+        """
+
+        line = json.dumps([op, *args], separators=(',', ':')).encode('utf-8') + b'\n'
+        with self.__lock:
+            self.__file.write(line)
+            self.__file.flush()
+            response = self.__file.readline()
+        if not response:
+            raise Exception('The inventory server closed the connection')
+        ok, result = json.loads(response)
+        if not ok:
+            raise Exception(result)
+        return result
+
+    @staticmethod
+    def __tracks(rows):
+        return [DC.Track(position, title, length) for position, title, length in rows]
+
+    def load(self, lazy: bool = False) -> DC.Inventory:
+        rows = self.request('albums', not lazy)
+        table = DC.Inventory()
+        table.extend(DC.CD(cd_id, title, artist) for cd_id, title, artist, _ in rows)
+        for cd_id, _, _, tracks in rows:
+            if lazy:
+                if tracks:
+                    table.get_cd(cd_id).set_track_source(self)
+            else:
+                table.get_cd(cd_id).add_tracks(ServerStorage.__tracks(tracks))
+        table.mark_clean()
+        return table
+
+    def load_tracks(self, cd_id: int) -> list:
+        return ServerStorage.__tracks(self.request('tracks', cd_id))
+
+    def get_cd(self, cd_id: int) -> DC.CD:
+        cd_id, title, artist, tracks = self.request('get', cd_id)
+        cd = DC.CD(cd_id, title, artist)
+        cd.add_tracks(ServerStorage.__tracks(tracks))
+        cd.mark_clean()
+        return cd
+
+    def save(self, table: DC.Inventory) -> None:
+        """Sends the changes since the last load or save, lines the server could not apply are printed"""
+        try:
+            errors = self.request('apply', IO.FileIO.journal_lines(table, tag_new=True))
+        except Exception as e:
+            print('There was a general error!', e, sep='\n')
+            return
+        table.mark_clean()
+        for number, message in errors:
+            print('Change {} was not saved: {}'.format(number, message))
+        if errors:
+            print('Reload the inventory with [l] to see it as it is on the server.')
+
+    def save_all(self, table: DC.Inventory) -> None:
+        """Sends the changes and has the server rewrite its whole storage"""
+        self.save(table)
+        try:
+            self.request('compact')
+        except Exception as e:
+            print('There was a general error!', e, sep='\n')
+
+    def close(self) -> None:
+        self.__file.close()
+        self.__socket.close()
+
+
+if __name__ == '__main__':
+    objParser = argparse.ArgumentParser(description='Serves one CD Inventory to several CD_Inventory.py clients')
+    objParser.add_argument('--socket', default='cd_inventory.sock', help='Unix domain socket to listen on')
+    objParser.add_argument('--sqlite', metavar='DATABASE', help='keep the inventory in an SQLite database')
+    objArgs = objParser.parse_args()
+    if objArgs.sqlite:
+        objStorage = IO.SQLiteStorage(objArgs.sqlite)
+    else:
+        objStorage = IO.TextFileStorage(['AlbumInventory.txt', 'TrackInventory.txt', 'InventoryJournal.txt'])
+    objServer = InventoryServer(objStorage, objArgs.socket)
+    print('Serving {} CD / Albums on {}, stop with Ctrl-C'.format(len(objServer.table), objArgs.socket))
+    try:
+        objServer.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    with objServer.lock.write():  # lets a request that is still running finish first
+        objServer.shutdown()
+        objStorage.save(objServer.table)
+        objStorage.close()
@@ -9,17 +9,31 @@
 if __name__ == '__main__':
     raise Exception('This file is not meant to ran by itself')
 
+import bisect
+import contextlib
+import io
+import itertools
+import json
+import re
+import time
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for CatalogueStats
+    np = None
+
 import DataClasses as DC
 
 
 class DataProcessor:
     """Processing the data in the application"""
     @staticmethod
-    def add_CD(CDInfo, table):
+    def add_CD(CDInfo, table, index=None):
         """function to add CD info in CDinfo to the inventory table.
         Args:
             CDInfo (tuple): Holds information (ID, CD Title, CD Artist) to be added to inventory.
-            table (list of CD Objects): 2D data structure (list of CD Objects) that holds the data during runtime.
+            table (DC.Inventory): Inventory of CD Objects that holds the data during runtime.
+            index (SearchIndex, optional): search index to update.
         Returns:
             None.
         """
@@ -31,13 +45,53 @@ class DataProcessor:
             raise Exception('ID must be an Integer!')
         row = DC.CD(cdId, title, artist)
         table.append(row)
-        DC.CD.sort(table)
+        if index is not None:
+            index.add_cd(row)
+
+    @staticmethod
+    def add_CDs(CDInfos, table, index=None):
+        """adds the CDs in CDInfos to the inventory table in one batch
+        Every row is checked before any is added, so a bad row leaves table unchanged.
+        The ID order is restored once for the batch instead of once per CD.
+        Args:
+            CDInfos (iterable of tuples): (ID, CD Title, CD Artist) of every CD to be added.
+            table (DC.Inventory): Inventory of CD Objects that holds the data during runtime.
+            index (SearchIndex, optional): search index to update.
+        Raises:
+            Exception: Listing every bad row: IDs that are not integers, already in table or repeated.
+        Returns:
+            None.
+        """
+
+        rows = []
+        errors = []
+        seen = {}
+        for number, (cdId, title, artist) in enumerate(CDInfos, 1):
+            try:
+                cdId = int(cdId)
+            except:
+                errors.append('row {}: ID must be an Integer!'.format(number))
+                continue
+            if cdId in table:
+                errors.append('row {}: Album with ID {} already exists'.format(number, cdId))
+            elif cdId in seen:
+                errors.append('row {}: Album ID {} is repeated from row {}'.format(number, cdId, seen[cdId]))
+            else:
+                seen[cdId] = number
+                rows.append(DC.CD(cdId, title, artist))
+        if errors:
+            raise Exception('{} of the Albums could not be added, none were:\n{}'.format(
+                len(errors), '\n'.join(errors)))
+        table.extend(rows)
+        if index is not None:
+            for row in rows:
+                index.add_cd(row)
 
     @staticmethod
-    def select_cd(table: list, cd_idx: int) -> DC.CD:
+    def select_cd(table: DC.Inventory, cd_idx: int) -> DC.CD:
         """selects a CD object out of table that has the ID cd_idx
         Args:
-            table (list): Inventory list of CD objects.
+            table (DC.Inventory): Inventory of CD objects.
             cd_idx (int): id of CD object to return
         Raises:
             Exception: If id is not in list.
@@ -50,18 +104,16 @@ class DataProcessor:
         except ValueError as e:
             print('ID must be an integer')
             print(e.__doc__)
-        for cd in table:
-            if cd.cd_id == cd_idx:
-                return cd
-        raise Exception('CD does not exist')
+        return table.get_cd(cd_idx)
 
 
     @staticmethod
-    def add_track(track_info: tuple, cd: DC.CD) -> None:
+    def add_track(track_info: tuple, cd: DC.CD, index=None) -> None:
         """adds a Track object with attributes in track_info to cd
         Args:
             track_info (tuple): Tuple containing track info (position, title, Length).
             cd (DC.CD): cd object the tarck gets added to.
+            index (SearchIndex, optional): search index to update.
         Raises:
             Exception: DESCraised in case position is not an integer.
         Returns:
@@ -75,4 +127,307 @@ class DataProcessor:
             raise Exception('Position must be an integer')
         track = DC.Track(pos, ttl, lng)
         cd.add_track(track)
+        if index is not None:
+            index.add_track(cd.cd_id, track)
+
+    @staticmethod
+    def add_tracks(track_infos, cd: DC.CD, index=None) -> None:
+        """adds the tracks in track_infos to cd in one batch
+        Every row is checked before any is added, so a bad row leaves cd unchanged.
+        The tracks are sorted once for the batch instead of once per track.
+        Args:
+            track_infos (iterable of tuples): (position, title, Length) of every track to be added.
+            cd (DC.CD): cd object the tracks get added to.
+            index (SearchIndex, optional): search index to update.
+        Raises:
+            Exception: Listing every bad row: positions that are not integers greater than 0,
+            already taken on cd or repeated.
+        Returns:
+            None.
+        """
+
+        tracks = []
+        errors = []
+        seen = {}
+        taken = {track.position for track in cd.cd_tracks}
+        for number, (pos, ttl, lng) in enumerate(track_infos, 1):
+            try:
+                pos = int(pos)
+            except:
+                errors.append('row {}: Position must be an integer'.format(number))
+                continue
+            if pos < 1:
+                errors.append('row {}: Track position must be greater than 0'.format(number))
+            elif pos in taken:
+                errors.append('row {}: Track {} already exists'.format(number, pos))
+            elif pos in seen:
+                errors.append('row {}: Track {} is repeated from row {}'.format(number, pos, seen[pos]))
+            else:
+                seen[pos] = number
+                tracks.append(DC.Track(pos, ttl, lng))
+        if errors:
+            raise Exception('{} of the tracks could not be added, none were:\n{}'.format(
+                len(errors), '\n'.join(errors)))
+        cd.add_tracks(tracks)
+        if index is not None:
+            for track in tracks:
+                index.add_track(cd.cd_id, track)
+
+    @staticmethod
+    def rmv_track(track_id: int, cd: DC.CD, index=None) -> None:
+        """removes the track at position track_id from cd
+        Args:
+            track_id (int): position of the track to be removed.
+            cd (DC.CD): cd object the track gets removed from.
+            index (SearchIndex, optional): search index to update.
+        Raises:
+            Exception: If there is no track at this position.
+        Returns:
+            None.
+        """
+
+        cd.rmv_track(track_id)
+        if index is not None:
+            index.remove_track(cd.cd_id, track_id)
+
+
+class BatchProcessor:
+    """Applies operations read as JSON lines, without prompts or screen output:
+        {"op": "add_cd", "id": 1, "title": "...", "artist": "..."}
+        {"op": "add_track", "cd": 1, "position": 1, "title": "...", "length": "3:45"}
+        {"op": "remove_track", "cd": 1, "position": 1}
+        {"op": "save"}
+    Every operation goes through DataProcessor. A line that fails is reported and skipped, the others
+    are still applied. "save" does not save on the spot; it asks for a single save after the last line.
+    Empty lines and lines starting with # are ignored.
+    """
+
+    ###    Methods    ###
+    @staticmethod
+    def __apply(command, table, index):
+        """Applies one decoded command, returns True if it asks for a save"""
+        op = command.get('op')
+        if op == 'add_cd':
+            DataProcessor.add_CD((command['id'], command['title'], command['artist']), table, index)
+        elif op == 'add_track':
+            cd = DataProcessor.select_cd(table, command['cd'])
+            DataProcessor.add_track((command['position'], command['title'], command['length']), cd, index)
+        elif op == 'remove_track':
+            cd = DataProcessor.select_cd(table, command['cd'])
+            DataProcessor.rmv_track(int(command['position']), cd, index)
+        elif op == 'save':
+            return True
+        else:
+            raise Exception('Unknown operation {!r}'.format(op))
+        return False
+
+    @staticmethod
+    def run(lines, table, index=None) -> dict:
+        """Applies the operations in lines to table
+        Args:
+            lines (iterable of strings): one JSON object per line, e.g. an open file or sys.stdin.
+            table (DC.Inventory): Inventory of CD Objects that holds the data during runtime.
+            index (SearchIndex, optional): search index to update.
+        Returns:
+            report (dict): 'ops' applied, 'errors' as a list of (line number, message), 'save' True if
+            a line asked for a save, 'seconds' and 'ops_per_sec'.
+        """
+
+        ops = 0
+        errors = []
+        save = False
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for number, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    command = json.loads(line)
+                    if type(command) != dict:
+                        raise Exception('Line is not a JSON object')
+                    save = BatchProcessor.__apply(command, table, index) or save
+                    ops += 1
+                except KeyError as e:
+                    errors.append((number, 'Missing field {}'.format(e)))
+                except Exception as e:
+                    errors.append((number, str(e)))
+        seconds = time.perf_counter() - start
+        return {'ops': ops, 'errors': errors, 'save': save, 'seconds': seconds,
+                'ops_per_sec': ops / seconds if seconds else None}
+
+
+class SearchIndex:
+    """Inverted index over the words in CD titles, artists and track titles:
+    Words are matched case-insensitive, every word of a query as a prefix.
+    A match is identified by (cd_id, position), position 0 stands for the CD / Album itself.
+    methods:
+        add_cd(cd): Indexes title and artist of cd and all of its tracks -> None
+        remove_cd(cd_id): Removes a CD and its tracks from the index -> None
+        add_track(cd_id, track): Indexes the title of track, replacing the track at its position -> None
+        remove_track(cd_id, position): Removes a track from the index -> None
+        search(query): -> (list) sorted (cd_id, position) tuples matching all words of query
+    """
+
+    ###    Constructor    ###
+    def __init__(self, table=()) -> None:
+        """Creates an index of the CD objects in table"""
+        ###    Attributes    ###
+        self.__postings = {}  # word -> set of (cd_id, position)
+        self.__words = []  # sorted list of all words, for prefix lookups
+        self.__entries = {}  # cd_id -> {position: words}, to remove entries after the text changed
+        for cd in table:
+            self.add_cd(cd)
+
+    ###    Methods    ###
+    @staticmethod
+    def tokenize(text: str) -> set:
+        """Returns: (set) lower case words in text"""
+        return set(re.findall(r'\w+', text.lower()))
+
+    def __add(self, cd_id, position, words):
+        """Indexes words under (cd_id, position), replacing what was indexed there before"""
+        self.__remove(cd_id, position)
+        self.__entries.setdefault(cd_id, {})[position] = words
+        for word in words:
+            if word not in self.__postings:
+                self.__postings[word] = set()
+                bisect.insort(self.__words, word)
+            self.__postings[word].add((cd_id, position))
+
+    def __remove(self, cd_id, position):
+        """Removes the words indexed under (cd_id, position)"""
+        entries = self.__entries.get(cd_id)
+        if entries is None or position not in entries:
+            return
+        for word in entries.pop(position):
+            postings = self.__postings[word]
+            postings.discard((cd_id, position))
+            if not postings:
+                del self.__postings[word]
+                del self.__words[bisect.bisect_left(self.__words, word)]
+        if not entries:
+            del self.__entries[cd_id]
+
+    def add_cd(self, cd: DC.CD) -> None:
+        """Indexes title and artist of cd and the titles of all its tracks"""
+        self.__add(cd.cd_id, 0, self.tokenize(cd.cd_title) | self.tokenize(cd.cd_artist))
+        for track in cd.cd_tracks:
+            self.add_track(cd.cd_id, track)
+
+    def remove_cd(self, cd_id: int) -> None:
+        """Removes the CD with ID cd_id and its tracks from the index"""
+        for position in list(self.__entries.get(cd_id, ())):
+            self.__remove(cd_id, position)
+
+    def add_track(self, cd_id: int, track: DC.Track) -> None:
+        """Indexes the title of track on the CD with ID cd_id"""
+        self.__add(cd_id, track.position, self.tokenize(track.title))
+
+    def remove_track(self, cd_id: int, position: int) -> None:
+        """Removes the track at position on the CD with ID cd_id from the index"""
+        self.__remove(cd_id, position)
+
+    def __prefix_words(self, prefix):
+        """Returns: (list) all indexed words starting with prefix"""
+        lo = bisect.bisect_left(self.__words, prefix)
+        hi = bisect.bisect_left(self.__words, prefix + '\U0010ffff', lo)
+        return self.__words[lo:hi]
+
+    def search(self, query: str) -> list:
+        """Finds CDs and tracks whose words start with every word of query
+        Args:
+            query (string): one or more words, case does not matter.
+        Returns:
+            results (list): sorted (cd_id, position) tuples, position 0 for a CD / Album match.
+        """
+
+        prefixes = {prefix: self.__prefix_words(prefix) for prefix in self.tokenize(query)}
+        if not prefixes:
+            return []
+        # look up the prefix with the fewest entries, then filter its matches by the other prefixes
+        first = min(prefixes, key=lambda prefix: sum(len(self.__postings[word]) for word in prefixes[prefix]))
+        results = set()
+        for word in prefixes.pop(first):
+            results |= self.__postings[word]
+        for prefix in prefixes:
+            results = {(cd_id, position) for cd_id, position in results
+                       if any(word.startswith(prefix) for word in self.__entries[cd_id][position])}
+        return sorted(results)
+
+
+class CatalogueStats:
+    """Runtime statistics over the whole inventory, computed with NumPy:
+    The constructor collects every CD and track once into flat arrays, all statistics are then
+    vectorised passes over these arrays. Tracks whose length could not be parsed count as tracks
+    but add no runtime.
+    methods:
+        album_runtimes() -> (list) (cd_id, total seconds, average seconds per track) per CD / Album
+        artist_runtimes() -> (list) (artist, total seconds, average seconds per track) per artist
+        track_count_histogram() -> (list) (number of tracks, number of albums) pairs
+        longest_tracks(n) -> (list) (cd_id, position, seconds) of the n longest tracks
+    """
+
+    ###    Constructor    ###
+    def __init__(self, table) -> None:
+        """Collects the CDs and tracks of table (DC.Inventory) into arrays"""
+        if np is None:
+            raise Exception('The statistics need NumPy, install it with: pip install numpy')
+        ###    Attributes    ###
+        cds = list(table)
+        track_lists = [cd.cd_tracks for cd in cds]
+        tracks = list(itertools.chain.from_iterable(track_lists))
+        self.__cd_ids = np.fromiter((cd.cd_id for cd in cds), dtype=np.int64, count=len(cds))
+        # artist codes group the CDs without comparing artist strings; equal artists are mostly one
+        # shared string, so the table finds them by identity
+        artists = DC.SymbolTable()
+        self.__cd_artist = np.fromiter((artists.code(cd.cd_artist) for cd in cds), dtype=np.int64, count=len(cds))
+        self.__artists = artists.strings()
+        self.__track_counts = np.fromiter((len(t) for t in track_lists), dtype=np.int64, count=len(cds))
+        self.__track_cd = np.repeat(np.arange(len(cds), dtype=np.int64), self.__track_counts)
+        self.__track_position = np.fromiter((t.position for t in tracks), dtype=np.int64, count=len(tracks))
+        seconds = np.fromiter((-1 if t.seconds is None else t.seconds for t in tracks), dtype=np.int64,
+                              count=len(tracks))
+        self.__known = seconds >= 0
+        self.__track_seconds = np.where(self.__known, seconds, 0)
+
+    ###    Methods    ###
+    @staticmethod
+    def __totals(groups, n_groups, seconds, known):
+        """Returns: total seconds and average seconds per track with a known length, for each group"""
+        total = np.bincount(groups, weights=seconds, minlength=n_groups)
+        count = np.bincount(groups, weights=known, minlength=n_groups)
+        average = np.divide(total, count, out=np.zeros(n_groups), where=count > 0)
+        return total, average
+
+    def album_runtimes(self) -> list:
+        """Returns: (list) (cd_id, total seconds, average seconds per track) per CD / Album, ordered by ID"""
+        total, average = self.__totals(self.__track_cd, len(self.__cd_ids), self.__track_seconds, self.__known)
+        order = np.argsort(self.__cd_ids, kind='stable')
+        return list(zip(self.__cd_ids[order].tolist(), total[order].astype(np.int64).tolist(),
+                        average[order].tolist()))
+
+    def artist_runtimes(self) -> list:
+        """Returns: (list) (artist, total seconds, average seconds per track) per artist, longest first"""
+        groups = self.__cd_artist[self.__track_cd]
+        total, average = self.__totals(groups, len(self.__artists), self.__track_seconds, self.__known)
+        present = np.flatnonzero(np.bincount(self.__cd_artist, minlength=len(self.__artists)))
+        order = sorted(present.tolist(), key=lambda i: (-total[i], self.__artists[i]))
+        return [(self.__artists[i], int(total[i]), float(average[i])) for i in order]
+
+    def track_count_histogram(self) -> list:
+        """Returns: (list) (number of tracks, number of albums with that many tracks), albums present only"""
+        histogram = np.bincount(self.__track_counts)
+        counts = np.flatnonzero(histogram)
+        return list(zip(counts.tolist(), histogram[counts].tolist()))
 
+    def longest_tracks(self, n: int = 10) -> list:
+        """Returns: (list) (cd_id, position, seconds) of the n longest tracks, longest first"""
+        n = min(n, int(self.__known.sum()))
+        if n <= 0:
+            return []
+        seconds = np.where(self.__known, self.__track_seconds, -1)
+        top = np.argpartition(-seconds, n - 1)[:n]
+        top = top[np.argsort(-seconds[top], kind='stable')]
+        return list(zip(self.__cd_ids[self.__track_cd[top]].tolist(), self.__track_position[top].tolist(),
+                        seconds[top].tolist()))
@@ -10,7 +10,7 @@ import DataClasses as DC
 import ProcessingClasses as PC
 import IOClasses as IO
 
-lstOfCDObjects = []
+lstOfCDObjects = DC.Inventory()
 file_name = ['TestCD.txt', 'TestTrack.txt']
 
 print('\n\nTesting Track class')
@@ -38,6 +38,17 @@ lstOfCDObjects.append(cd1)
 print('\n\nTesting of class FileIO')
 IO.FileIO.save_inventory(file_name, lstOfCDObjects)
 print(IO.FileIO.load_inventory(file_name))
+for item in IO.FileIO.iter_inventory(file_name):
+    print('streamed:', item.get_long_record())
+
+print('\n\nTesting of classes BinaryIO and BinaryInventory')
+IO.BinaryIO.text_to_binary(file_name, 'TestInventory.bin')
+with IO.BinaryInventory('TestInventory.bin') as binInventory:
+    print('CD 1 from binary file:', binInventory.get_cd(1).get_long_record())
+IO.BinaryIO.binary_to_text('TestInventory.bin', ['TestCD_rt.txt', 'TestTrack_rt.txt'])
+for original, copy in zip(file_name, ['TestCD_rt.txt', 'TestTrack_rt.txt']):
+    with open(original) as file_a, open(copy) as file_b:
+        print('round trip of {} identical: {}'.format(original, sorted(file_a) == sorted(file_b)))
 
 print('\n\nTesting ScreenIO class')
 print('Main menu:')